@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from database import create_client, mongo_settings
+from models import MESSAGE_STATUSES
+from structured_logging import TEXT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# User agent families, checked in order; keeps the rollup keys bounded and free of "." and "$"
+USER_AGENT_FAMILIES = [
+    ("bot", re.compile(r"bot|crawl|spider|slurp", re.I)),
+    ("script", re.compile(r"curl/|wget/|python-|httpx|okhttp|go-http-client|axios|node-fetch|postman", re.I)),
+    ("Edge", re.compile(r"Edg(e|A|iOS)?/")),
+    ("Opera", re.compile(r"OPR/|Opera")),
+    ("Samsung Internet", re.compile(r"SamsungBrowser/")),
+    ("Firefox", re.compile(r"Firefox/|FxiOS/")),
+    ("Chrome", re.compile(r"Chrome/|CriOS/")),
+    ("Safari", re.compile(r"Safari/")),
+]
+
+
+def user_agent_family(user_agent: Optional[str]) -> str:
+    if not user_agent:
+        return "unknown"
+    for family, pattern in USER_AGENT_FAMILIES:
+        if pattern.search(user_agent):
+            return family
+    return "other"
+
+
+def day_key(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m-%d")
+
+
+class DailyRollups:
+    """Per-day contact message counters in `contact_stats_daily`, one document per UTC day.
+
+    Each document holds the number of messages received that day, how many of
+    them currently have each status, and a count per user agent family. Writes
+    only adjust counters in memory; a background task folds them into Mongo
+    with `$inc` upserts every `flush_interval` seconds, so the write paths
+    never wait on it. Counters not yet flushed are lost if the process dies;
+    `python analytics.py rebuild` recomputes them from the messages.
+
+    The counters only make sense relative to a starting point, so `backfill`
+    builds them from the existing messages when there are no rollups yet.
+    """
+
+    def __init__(self, collection, flush_interval: float = 5.0):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        # day -> {counter path: increment}
+        self._pending: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def backfill(self, messages) -> Optional[int]:
+        """Rebuild from `messages` if no rollups exist yet; returns the days built, or None if skipped.
+
+        Without it, a status change on a message stored before the first deploy
+        would take its old status's counter below zero. Run before the worker
+        records anything. Workers starting together may both rebuild; they
+        write the same documents, and the loser's duplicates are ignored.
+        """
+        if await self.collection.find_one({}, {"_id": 1}) is not None:
+            return None
+        try:
+            return await rebuild(messages, self.collection)
+        except BulkWriteError as e:
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+            if errors or e.details.get("writeConcernErrors"):
+                raise
+            return None
+
+    def record_inserts(self, documents: Iterable[dict]):
+        for document in documents:
+            counters = self._pending[day_key(document["timestamp"])]
+            counters["total"] += 1
+            counters[f"status.{document.get('status', 'new')}"] += 1
+            counters[f"user_agents.{user_agent_family(document.get('user_agent'))}"] += 1
+
+    def record_status_changes(self, previous: Iterable[dict], status: str):
+        """`previous` holds each changed message's timestamp and status before the change."""
+        for document in previous:
+            if document["status"] == status:
+                continue
+            counters = self._pending[day_key(document["timestamp"])]
+            counters[f"status.{document['status']}"] -= 1
+            counters[f"status.{status}"] += 1
+
+    def record_counts(self, counts: Iterable[dict], status: str):
+        """Like record_status_changes, from {"day", "status", "count"} groups (see count_by_day_and_status)."""
+        for group in counts:
+            if group["status"] == status:
+                continue
+            counters = self._pending[group["day"]]
+            counters[f"status.{group['status']}"] -= group["count"]
+            counters[f"status.{status}"] += group["count"]
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        requests = [
+            UpdateOne(
+                {"_id": day},
+                {"$inc": {path: amount for path, amount in counters.items() if amount}, "$setOnInsert": {"day": datetime.strptime(day, "%Y-%m-%d")}},
+                upsert=True,
+            )
+            for day, counters in pending.items()
+            if any(counters.values())
+        ]
+        if not requests:
+            return
+        try:
+            await self.collection.bulk_write(requests, ordered=False)
+        except Exception:
+            # Put the increments back so the next flush retries them
+            for day, counters in pending.items():
+                for path, amount in counters.items():
+                    self._pending[day][path] += amount
+            raise
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush contact message rollups: {str(e)}")
+
+    async def query(self, since: date, until: date) -> Dict[str, Any]:
+        """Daily counters for [since, until] (inclusive), with empty days filled in and range totals."""
+        documents = {
+            document["_id"]: document
+            async for document in self.collection.find(
+                {"_id": {"$gte": since.isoformat(), "$lte": until.isoformat()}},
+                {"day": 0},
+            )
+        }
+        days = []
+        totals: Dict[str, Any] = {"total": 0, "status": defaultdict(int), "user_agents": defaultdict(int)}
+        current = since
+        while current <= until:
+            key = current.isoformat()
+            document = documents.get(key, {})
+            entry = {
+                "day": key,
+                "total": document.get("total", 0),
+                "status": {status: document.get("status", {}).get(status, 0) for status in MESSAGE_STATUSES},
+                "user_agents": dict(document.get("user_agents", {})),
+            }
+            # Include increments this worker hasn't flushed yet
+            for path, amount in self._pending.get(key, {}).items():
+                if path == "total":
+                    entry["total"] += amount
+                else:
+                    group, _, name = path.partition(".")
+                    entry[group][name] = entry[group].get(name, 0) + amount
+            totals["total"] += entry["total"]
+            for group in ("status", "user_agents"):
+                for name, count in entry[group].items():
+                    totals[group][name] += count
+            days.append(entry)
+            current += timedelta(days=1)
+        totals["user_agents"] = dict(sorted(totals["user_agents"].items(), key=lambda item: (-item[1], item[0])))
+        totals["status"] = dict(totals["status"])
+        return {"since": since.isoformat(), "until": until.isoformat(), "days": days, "totals": totals}
+
+
+async def count_by_day_and_status(collection, query: Dict[str, Any]) -> List[dict]:
+    """Messages matching `query`, grouped by UTC day and status."""
+    pipeline = [
+        {"$match": query},
+        {"$group": {
+            "_id": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}, "status": "$status"},
+            "count": {"$sum": 1},
+        }},
+    ]
+    return [
+        {"day": group["_id"]["day"], "status": group["_id"]["status"], "count": group["count"]}
+        async for group in collection.aggregate(pipeline)
+    ]
+
+
+async def rebuild(messages, rollups, since: Optional[date] = None, until: Optional[date] = None) -> int:
+    """Recompute the rollup documents for [since, until] from the messages themselves."""
+    query: Dict[str, Any] = {}
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = datetime.combine(since, datetime.min.time())
+        if until:
+            query["timestamp"]["$lt"] = datetime.combine(until + timedelta(days=1), datetime.min.time())
+    days: Dict[str, Dict[str, Any]] = {}
+    projection = {"_id": 0, "timestamp": 1, "status": 1, "user_agent": 1}
+    async for document in messages.find(query, projection).batch_size(1000):
+        key = day_key(document["timestamp"])
+        entry = days.setdefault(key, {"total": 0, "status": defaultdict(int), "user_agents": defaultdict(int)})
+        entry["total"] += 1
+        entry["status"][document.get("status", "new")] += 1
+        entry["user_agents"][user_agent_family(document.get("user_agent"))] += 1
+
+    if since or until:
+        range_filter = {}
+        if since:
+            range_filter["$gte"] = since.isoformat()
+        if until:
+            range_filter["$lte"] = until.isoformat()
+        await rollups.delete_many({"_id": range_filter})
+    else:
+        await rollups.delete_many({})
+    if days:
+        await rollups.insert_many([
+            {
+                "_id": key,
+                "day": datetime.strptime(key, "%Y-%m-%d"),
+                "total": entry["total"],
+                "status": dict(entry["status"]),
+                "user_agents": dict(entry["user_agents"]),
+            }
+            for key, entry in sorted(days.items())
+        ])
+    return len(days)
+
+
+async def _rebuild(since: Optional[date], until: Optional[date]):
+    mongo_url, db_name = mongo_settings()
+    client = create_client(mongo_url)
+    try:
+        db = client[db_name]
+        count = await rebuild(db.contact_messages, db.contact_stats_daily, since, until)
+        print(f"Rebuilt contact message rollups for {count} days")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage contact message rollups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Recompute daily rollups from contact_messages")
+    rebuild_parser.add_argument("--since", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    rebuild_parser.add_argument("--until", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT)
+    asyncio.run(_rebuild(args.since, args.until))
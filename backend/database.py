@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from metrics import mongo_event_listeners, mongo_pool_checked_out, mongo_pool_connections
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+# Motor/pymongo pool options and the environment variables that override them
+POOL_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int, 100),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int, 5),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_TIME_MS", int, 300000),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", int, 5000),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int, 5000),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int, 2000),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", int, 10000),
+}
+
+
+def mongo_settings() -> Tuple[Optional[str], Optional[str]]:
+    """MONGO_URL and DB_NAME, read from the environment or backend/.env, for the command line tools."""
+    load_dotenv(Path(__file__).parent / ".env")
+    return os.environ.get("MONGO_URL"), os.environ.get("DB_NAME")
+
+
+def client_options() -> Dict[str, Any]:
+    return {option: cast(os.environ.get(env, default)) for option, (env, cast, default) in POOL_OPTIONS.items()}
+
+
+def create_client(mongo_url: Optional[str]) -> "AsyncIOMotorClient":
+    if not mongo_url:
+        raise RuntimeError("MONGO_URL is not set")
+    # Imported here so processes that never reach the database don't pay for Motor
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(mongo_url, event_listeners=mongo_event_listeners(), **client_options())
+
+
+async def warm_up(client: "AsyncIOMotorClient", connections: int) -> float:
+    """Select a server and open `connections` pooled connections before traffic arrives.
+
+    Concurrent pings each need their own connection, so the pool grows to
+    `connections` instead of paying for connection setup on the first requests.
+    Returns the elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    await client.admin.command("ping")
+    if connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+    return time.perf_counter() - start
+
+
+def pool_state() -> Dict[str, Any]:
+    options = client_options()
+    return {
+        "max_pool_size": options["maxPoolSize"],
+        "min_pool_size": options["minPoolSize"],
+        "connections": {labels[0]: int(value) for labels, value in mongo_pool_connections.samples().items()},
+        "checked_out": {labels[0]: int(value) for labels, value in mongo_pool_checked_out.samples().items()},
+    }
+
+
+class ReadinessProbe:
+    """Pings Mongo at most once per `ttl` seconds, sharing the result between callers.
+
+    Concurrent checks while a ping is in flight wait for that ping instead of
+    issuing their own, so load balancer probes cost the database at most one
+    round trip per `ttl` per worker.
+    """
+
+    def __init__(self, client: "AsyncIOMotorClient", ttl: float = 5.0, timeout: float = 2.0):
+        self.client = client
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = float("-inf")
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def check(self) -> Dict[str, Any]:
+        if time.monotonic() - self._checked_at < self.ttl:
+            return {**self._result, "cached": True}
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._ping())
+        task = self._inflight
+        try:
+            return {**await asyncio.shield(task), "cached": False}
+        finally:
+            if self._inflight is task and task.done():
+                self._inflight = None
+
+    async def _ping(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.client.admin.command("ping"), timeout=self.timeout)
+            result = {"ready": True, "mongo_rtt_ms": round((time.perf_counter() - start) * 1000, 3)}
+        except Exception as e:
+            result = {"ready": False, "error": f"{type(e).__name__}: {str(e)}"}
+        self._result = result
+        self._checked_at = time.monotonic()
+        return result
@@ -0,0 +1,58 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator
+
+from pagination import MESSAGE_SORT
+from serialization import dumps
+
+EXPORT_FIELDS = ["id", "timestamp", "name", "email", "subject", "message", "status", "ip_address", "user_agent"]
+
+# Documents fetched per cursor batch and rows written per chunk of the response body
+CURSOR_BATCH_SIZE = 500
+ROWS_PER_CHUNK = 200
+
+# Spreadsheets evaluate cells starting with these as formulas; such cells get a leading '
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _to_ndjson(document: dict) -> bytes:
+    return dumps(document) + b"\n"
+
+
+def _csv_line(values) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _to_csv(document: dict) -> bytes:
+    return _csv_line(_csv_cell(document.get(field)) for field in EXPORT_FIELDS)
+
+
+async def export_messages(collection, query: dict, fmt: str) -> AsyncIterator[bytes]:
+    """Stream matching messages as NDJSON or CSV chunks straight off a Mongo cursor.
+
+    Only one cursor batch and one chunk of rows are held in memory at a time.
+    """
+    encode = _to_csv if fmt == "csv" else _to_ndjson
+    if fmt == "csv":
+        yield _csv_line(EXPORT_FIELDS)
+
+    cursor = collection.find(query, {"_id": 0}).sort(MESSAGE_SORT).batch_size(CURSOR_BATCH_SIZE)
+    rows = []
+    async for document in cursor:
+        rows.append(encode(document))
+        if len(rows) >= ROWS_PER_CHUNK:
+            yield b"".join(rows)
+            rows = []
+    if rows:
+        yield b"".join(rows)
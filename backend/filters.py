@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# The default admin listing hides messages flagged as spam
+NOT_SPAM: Dict[str, Any] = {"status": {"$ne": "spam"}}
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; convert aware query bounds to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def message_filter(
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Build a contact_messages filter on status and a [since, until) timestamp range."""
+    query: Dict[str, Any] = {}
+    since, until = naive_utc(since), naive_utc(until)
+    if status:
+        query["status"] = status
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lt"] = until
+    return query
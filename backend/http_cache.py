@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import route_label
+from static_assets import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+NO_STORE = "no-store"
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+# Headers that describe the body and must not be sent with a 304
+_BODY_HEADERS = ("content-length", "content-type", "content-encoding")
+
+
+def weak_etag(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored on both sides
+    opaque = etag.removeprefix("W/")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or opaque in candidates
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class HTTPCacheMiddleware:
+    """Adds Cache-Control, weak ETags with 304 handling, and gzip/brotli compression.
+
+    `policies` maps route paths (as in the router, e.g. "/api/portfolio") to a
+    Cache-Control value for successful GET requests; other routes get
+    `default_policy`, and other methods and error responses get no-store. Responses that already set Cache-Control, ETag or
+    Content-Encoding keep them. Only complete bodies are handled: streaming
+    responses are passed through as they are produced so their first bytes
+    are not delayed.
+
+    Compressed bodies of cacheable responses are kept in a small LRU keyed by
+    ETag and encoding, so repeated requests for unchanged content skip the
+    compressor.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: Dict[str, str],
+        default_policy: str = NO_STORE,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        cache_size: int = 256,
+    ):
+        self.app = app
+        self.policies = policies
+        self.default_policy = default_policy
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self._compressed: "OrderedDict[tuple[str, str], bytes]" = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        streaming = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] != "http.response.body" or streaming:
+                await send(message)
+            elif message.get("more_body", False):
+                # First chunk of a streamed body: send the headers now and get out of the way
+                streaming = True
+                self._apply_policy(scope, start["status"], MutableHeaders(scope=start))
+                await send(start)
+                await send(message)
+            else:
+                await self._send_complete(scope, start, message.get("body", b""), send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _apply_policy(self, scope: Scope, status: int, headers: MutableHeaders) -> str:
+        if "cache-control" not in headers:
+            # An error (a 400 for bad parameters, a 503 during a Mongo outage) must not outlive the request
+            cacheable = scope["method"] == "GET" and (200 <= status < 300 or status == 304)
+            headers["Cache-Control"] = self.policies.get(route_label(scope), self.default_policy) if cacheable else NO_STORE
+        return headers["cache-control"]
+
+    async def _send_complete(self, scope: Scope, start: Message, body: bytes, send: Send):
+        status = start["status"]
+        headers = MutableHeaders(scope=start)
+        request_headers = Headers(scope=scope)
+        cache_control = self._apply_policy(scope, status, headers)
+
+        encoded = "content-encoding" in headers or "content-range" in headers
+        encoding = None
+        if (
+            200 <= status < 300 and status != 204
+            and not encoded
+            and len(body) >= self.minimum_size
+            and _compressible(headers.get("content-type", ""))
+        ):
+            headers.add_vary_header("Accept-Encoding")
+            encoding = self._negotiate(request_headers.get("accept-encoding", ""))
+
+        etag = headers.get("etag")
+        if etag is not None and encoding is not None and not etag.startswith("W/"):
+            # A strong validator names exact bytes; the compressed body is only equivalent
+            etag = headers["ETag"] = "W/" + etag
+        if status == 200 and scope["method"] == "GET" and NO_STORE not in cache_control and not encoded:
+            if etag is None:
+                etag = headers["ETag"] = weak_etag(body)
+            if_none_match = request_headers.get("if-none-match")
+            if if_none_match is not None and etag_matches(if_none_match, etag):
+                for name in _BODY_HEADERS:
+                    if name in headers:
+                        del headers[name]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        if encoding is not None:
+            compressed = self._compress(body, encoding, etag if NO_STORE not in cache_control else None)
+            if len(compressed) < len(body):
+                body = compressed
+                headers["Content-Encoding"] = encoding
+        if status not in (204, 304):
+            headers["Content-Length"] = str(len(body))
+
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        for encoding in accepted_encodings(accept_encoding):
+            if encoding == "br" and brotli is not None:
+                return "br"
+            if encoding == "gzip":
+                return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        key = (etag, encoding)
+        if etag is not None and key in self._compressed:
+            self._compressed.move_to_end(key)
+            return self._compressed[key]
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if etag is not None:
+            self._compressed[key] = compressed
+            if len(self._compressed) > self.cache_size:
+                self._compressed.popitem(last=False)
+        return compressed
@@ -0,0 +1,109 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from filters import NOT_SPAM, message_filter
+from pagination import MESSAGE_SORT, encode_cursor, keyset_filter
+
+logger = logging.getLogger(__name__)
+
+# Indexes declared for the contact_messages collection, one per built-in query shape
+CONTACT_MESSAGE_INDEXES: List[IndexModel] = [
+    # update_message_status looks messages up by their public id
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    # Newest-first listings
+    IndexModel([("timestamp", DESCENDING)], name="timestamp_desc"),
+    # Keyset pagination in get_contact_messages
+    IndexModel(MESSAGE_SORT, name="timestamp_id"),
+    # Listings filtered by status
+    IndexModel([("status", ASCENDING), ("timestamp", DESCENDING)], name="status_timestamp"),
+]
+
+
+async def ensure_indexes(db, extra_indexes: Sequence[IndexModel] = ()) -> List[str]:
+    """Create the declared indexes plus `extra_indexes`, returning the names that are in place.
+
+    Indexes are created one at a time so that a single conflict (for example
+    duplicate ids blocking the unique index) does not prevent the rest.
+    """
+    created = []
+    for index in [*CONTACT_MESSAGE_INDEXES, *extra_indexes]:
+        name = index.document["name"]
+        try:
+            await db.contact_messages.create_indexes([index])
+            created.append(name)
+        except OperationFailure as e:
+            logger.error(f"Could not create index {name} on contact_messages: {str(e)}")
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    # Flatten the winning plan tree into its stage names, outermost first
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        if "inputStage" in plan:
+            plan = plan["inputStage"]
+        elif plan.get("inputStages"):
+            plan = plan["inputStages"][0]
+        else:
+            plan = None
+    return stages
+
+
+def _summarize(explain: Dict[str, Any]) -> Dict[str, Any]:
+    winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+    # Newer servers wrap the classic plan in a queryPlan document
+    winning = winning.get("queryPlan", winning)
+    stages = _plan_stages(winning)
+    return {
+        "stages": stages,
+        "uses_index": not any(stage.startswith("COLLSCAN") for stage in stages),
+    }
+
+
+def _explain_command(command: Dict[str, Any]) -> Dict[str, Any]:
+    return {"explain": command, "verbosity": "queryPlanner"}
+
+
+async def explain_builtin_queries(db) -> Dict[str, Dict[str, Any]]:
+    """Report the winning query plan for every query the API issues, with placeholder values."""
+    collection = db.contact_messages
+    now = datetime.utcnow()
+    sample_id = "00000000-0000-0000-0000-000000000000"
+    sample_cursor = encode_cursor(now, sample_id)
+    sample_range = message_filter(status="new", since=now - timedelta(days=30), until=now)
+
+    plans = {
+        # get_contact_messages, by default and with include_spam
+        "list_messages": await collection.find(keyset_filter(None, NOT_SPAM)).sort(MESSAGE_SORT).limit(51).explain(),
+        "list_messages_after_cursor": await collection.find(keyset_filter(sample_cursor, NOT_SPAM)).sort(MESSAGE_SORT).limit(51).explain(),
+        "list_messages_with_spam": await collection.find(keyset_filter(sample_cursor)).sort(MESSAGE_SORT).limit(51).explain(),
+        # export_contact_messages with status and date filters
+        "export_messages": await collection.find(sample_range).sort(MESSAGE_SORT).explain(),
+        # update_message_status
+        "update_message_status": await db.command(_explain_command({
+            "findAndModify": collection.name,
+            "query": {"id": sample_id, "status": {"$ne": "read"}},
+            "update": {"$set": {"status": "read"}},
+            "fields": {"_id": 0, "id": 1, "status": 1, "timestamp": 1},
+        })),
+        # bulk_update_message_status by ids: current statuses, then the update
+        "bulk_status_lookup": await collection.find({"id": {"$in": [sample_id]}}).explain(),
+        "bulk_update_by_ids": await db.command(_explain_command({
+            "update": collection.name,
+            "updates": [{"q": {"id": {"$in": [sample_id]}, "status": {"$ne": "read"}}, "u": {"$set": {"status": "read"}}, "multi": True}],
+        })),
+        # bulk_update_message_status by filter
+        "bulk_update_by_filter": await db.command(_explain_command({
+            "update": collection.name,
+            "updates": [{"q": sample_range, "u": {"$set": {"status": "read"}}, "multi": True}],
+        })),
+    }
+    return {name: _summarize(plan) for name, plan in plans.items()}
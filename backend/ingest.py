@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Spill files are named <prefix>.<pid>.jsonl, or <prefix>.<pid>-<n>.jsonl once claimed for replay;
+# <prefix>.jsonl is the single-process name used by earlier versions
+SPILL_PREFIX = "contact_messages"
+
+
+def _spill_owner(path: Path) -> Optional[int]:
+    parts = path.name.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        return int(parts[1].split("-")[0])
+    except ValueError:
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class QueueFullError(Exception):
+    """Raised when the write-behind queue stays full for longer than the submit timeout."""
+
+
+class ContactWriteBehindQueue:
+    """Accepts contact messages in memory and writes them to Mongo in batches.
+
+    Every accepted message is appended to a local spill file before the caller
+    is acknowledged. The file is truncated once everything queued has been
+    written, and replayed on the next start if the process died first, giving
+    at-least-once delivery. Replays rely on the unique `id` index to drop
+    messages that did reach Mongo before the crash.
+
+    Each process spills to its own file in `spill_dir`, so several workers can
+    share the directory. On start a worker claims (by atomic rename) and
+    replays the files of processes that are no longer running.
+
+    Without `fsync`, an acknowledged message is in the OS page cache, not on
+    disk: it survives the process crashing but not the host losing power or
+    the kernel crashing. `fsync` closes that gap at the cost of a disk flush
+    per message on the request path.
+    """
+
+    def __init__(
+        self,
+        collection,
+        spill_dir: Path,
+        max_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        submit_timeout: float = 0.5,
+        fsync: bool = False,
+        on_stored: Optional[Callable[[List[dict]], None]] = None,
+    ):
+        self.collection = collection
+        self.spill_dir = Path(spill_dir)
+        self.spill_path: Optional[Path] = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self.fsync = fsync
+        # Called with the documents of each batch that were inserted, leaving out replayed duplicates
+        self.on_stored = on_stored
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._spill = None
+        self._task: Optional[asyncio.Task] = None
+        # Batch currently being written, drained by stop() if the flush loop is cancelled mid-write
+        self._inflight: List[dict] = []
+        self._batch_ready = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + len(self._inflight)
+
+    async def start(self):
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.spill_path = self.spill_dir / f"{SPILL_PREFIX}.{os.getpid()}.jsonl"
+        for path in self._claim_orphaned_spills():
+            await self._replay_spill(path)
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, message: ContactMessage):
+        """Queue a message for insertion, waiting briefly for room when the queue is full."""
+        document = message.model_dump()
+        if self._queue.full():
+            try:
+                await asyncio.wait_for(self._queue.put(document), timeout=self.submit_timeout)
+            except asyncio.TimeoutError:
+                raise QueueFullError("Contact message queue is full")
+        else:
+            self._queue.put_nowait(document)
+        self._append_spill(message)
+        if self.depth >= self.batch_size:
+            self._batch_ready.set()
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        batch, self._inflight = self._inflight, []
+        while batch or not self._queue.empty():
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                # Whatever is left stays in the spill file and is replayed on the next start
+                logger.error(f"Failed to drain contact message queue, {self._queue.qsize() + len(batch)} messages left in spill file: {str(e)}")
+                break
+            batch = []
+        else:
+            self._truncate_spill()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            # Nothing left to replay, so don't leave an empty file behind for every worker pid
+            if self.spill_path.stat().st_size == 0:
+                self.spill_path.unlink()
+
+    def _append_spill(self, message: ContactMessage):
+        self._spill.write(message.model_dump_json() + "\n")
+        self._spill.flush()
+        if self.fsync:
+            os.fsync(self._spill.fileno())
+
+    def _truncate_spill(self):
+        if self._spill is not None:
+            self._spill.truncate(0)
+            self._spill.seek(0)
+        elif self.spill_path is not None and self.spill_path.exists():
+            self.spill_path.write_text("")
+
+    def _claim_orphaned_spills(self) -> List[Path]:
+        """Rename spill files left by dead processes (or an earlier process with our pid) to our own name.
+
+        Renaming is atomic, so when several workers start together each file
+        is claimed by exactly one of them. A claimed file that fails to replay
+        keeps our pid and is picked up again once this process is gone.
+        """
+        pid = os.getpid()
+        claimed = []
+        for path in sorted(self.spill_dir.glob(f"{SPILL_PREFIX}*.jsonl")):
+            owner = _spill_owner(path)
+            if owner is not None and owner != pid and _process_alive(owner):
+                continue
+            target = self.spill_dir / f"{SPILL_PREFIX}.{pid}-{len(claimed)}.jsonl"
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # claimed by another worker first
+            claimed.append(target)
+        return claimed
+
+    async def _replay_spill(self, path: Path):
+        with open(path, encoding="utf-8") as spill:
+            documents = [ContactMessage.model_validate_json(line).model_dump() for line in spill if line.strip()]
+        for start in range(0, len(documents), self.batch_size):
+            await self._insert(documents[start:start + self.batch_size])
+        if documents:
+            logger.info(f"Replayed {len(documents)} contact messages from {path}")
+        path.unlink()
+
+    async def _insert(self, batch: List[dict]):
+        stored = batch
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Duplicates are messages already written before a replay; anything else is a real failure
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+            if errors or e.details.get("writeConcernErrors"):
+                raise
+            # Hooks already ran for the duplicates when they were first written
+            duplicates = {err["index"] for err in e.details["writeErrors"]}
+            stored = [document for position, document in enumerate(batch) if position not in duplicates]
+        if self.on_stored is not None and stored:
+            self.on_stored(stored)
+
+    async def _collect_batch(self):
+        # Block for the first message, then wait until the batch fills or the interval expires
+        self._inflight.append(await self._queue.get())
+        if self.depth < self.batch_size:
+            self._batch_ready.clear()
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+        while len(self._inflight) < self.batch_size and not self._queue.empty():
+            self._inflight.append(self._queue.get_nowait())
+
+    async def _run(self):
+        backoff = self.flush_interval
+        while True:
+            await self._collect_batch()
+            while True:
+                try:
+                    await self._insert(self._inflight)
+                    backoff = self.flush_interval
+                    break
+                except Exception as e:
+                    logger.error(f"Failed to flush {len(self._inflight)} contact messages, retrying in {backoff:.2f}s: {str(e)}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 5.0)
+            self._inflight = []
+            if self._queue.empty():
+                self._truncate_spill()
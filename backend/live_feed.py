@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Inserts, and updates that touch a message's status
+CHANGE_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": "insert"},
+        {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+    ]}},
+]
+
+# (event id, event type, data)
+Event = Tuple[str, str, Dict[str, Any]]
+
+
+def _frame(event: Event) -> bytes:
+    event_id, event_type, data = event
+    return b"id: " + event_id.encode() + b"\nevent: " + event_type.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def _change_event(change: dict) -> Optional[Tuple[str, Dict[str, Any]]]:
+    document = change.get("fullDocument")
+    if document is None:
+        return None
+    if change["operationType"] == "insert":
+        return "message", {key: value for key, value in document.items() if key != "_id"}
+    return "status", {"id": document["id"], "status": document["status"]}
+
+
+class _Subscription:
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def put(self, event: Event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client can't keep up: end its stream once it has drained the
+            # queue, and let it reconnect from the last event it received
+            self.overflowed = True
+
+
+class LiveFeed:
+    """Fans contact message inserts and status changes out to server-sent event streams.
+
+    With a replica set, events come from a Mongo change stream, so every worker
+    sees every write and event ids are change stream resume tokens. Otherwise
+    the write paths publish their own changes and only clients connected to the
+    same worker see them; ids are then local to this process.
+
+    Each client gets a bounded queue of `client_queue_size` events. The last
+    `history` events are kept so a reconnecting client (sending Last-Event-ID)
+    gets what it missed; with change streams, older tokens are resumed from
+    Mongo directly. When neither is possible the client is sent a `reset`
+    event and should reload the listing.
+    """
+
+    def __init__(self, history: int = 1000, client_queue_size: int = 256):
+        self.client_queue_size = client_queue_size
+        self.source = "memory"
+        self._collection = None
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._subscriptions: Set[_Subscription] = set()
+        self._counter = itertools.count(1)
+        self._local_prefix = f"{os.getpid():x}.{int(time.time()):x}."
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def clients(self) -> int:
+        return len(self._subscriptions)
+
+    async def start(self, collection, source: str = "auto"):
+        """Follow `collection` with a change stream when `source` allows and the server supports it."""
+        if source not in ("auto", "change_stream", "memory"):
+            raise ValueError(f"Unknown live feed source: {source}")
+        if source == "memory":
+            return
+        try:
+            # Opening the stream runs the aggregate, which fails on standalone servers
+            stream = collection.watch(CHANGE_PIPELINE, full_document="updateLookup")
+            await stream.try_next()
+            token = stream.resume_token
+            await stream.close()
+        except Exception as e:
+            if source == "change_stream":
+                raise
+            logger.info(f"Change streams unavailable, live feed uses in-process events: {str(e)}")
+            return
+        self.source = "change_stream"
+        self._collection = collection
+        self._task = asyncio.create_task(self._watch(token))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def publish_local(self, event_type: str, data: Dict[str, Any]):
+        """Publish a change made by this process; ignored when a change stream reports it instead."""
+        if self.source == "memory":
+            self._publish((self._local_prefix + str(next(self._counter)), event_type, data))
+
+    def _publish(self, event: Event):
+        self._history.append(event)
+        for subscription in self._subscriptions:
+            subscription.put(event)
+
+    async def _watch(self, token: Optional[dict]):
+        backoff = 1.0
+        while True:
+            try:
+                async with self._collection.watch(CHANGE_PIPELINE, full_document="updateLookup", resume_after=token) as stream:
+                    backoff = 1.0
+                    async for change in stream:
+                        token = change["_id"]
+                        event = _change_event(change)
+                        if event is not None:
+                            self._publish((token["_data"],) + event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Live feed change stream failed, resuming in {backoff:.0f}s: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def _missed(self, last_event_id: str) -> Optional[List[Event]]:
+        """Events after `last_event_id`, or None if they can't be recovered."""
+        for position, event in enumerate(self._history):
+            if event[0] == last_event_id:
+                return list(itertools.islice(self._history, position + 1, None))
+        if self.source != "change_stream" or last_event_id.startswith(self._local_prefix):
+            return None
+        missed = []
+        try:
+            stream = self._collection.watch(CHANGE_PIPELINE, full_document="updateLookup", resume_after={"_data": last_event_id})
+            async with stream:
+                while (change := await stream.try_next()) is not None:
+                    event = _change_event(change)
+                    if event is not None:
+                        missed.append((change["_id"]["_data"],) + event)
+        except Exception as e:
+            logger.info(f"Could not resume live feed from {last_event_id}: {str(e)}")
+            return None
+        return missed
+
+    async def stream(
+        self,
+        last_event_id: Optional[str] = None,
+        include_spam: bool = False,
+        heartbeat: float = 15.0,
+        max_duration: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        """Server-sent event frames for one client, ending after `max_duration` seconds if set."""
+        # Subscribe before looking at the history, so nothing published meanwhile is missed
+        subscription = _Subscription(self.client_queue_size)
+        self._subscriptions.add(subscription)
+        getter: Optional[asyncio.Task] = None
+        try:
+            yield b"retry: 3000\n\n"
+            sent: Set[str] = set()
+            if last_event_id:
+                missed = await self._missed(last_event_id)
+                if missed is None:
+                    yield b"event: reset\ndata: {}\n\n"
+                else:
+                    for event in missed:
+                        sent.add(event[0])
+                        if self._visible(event, include_spam):
+                            yield _frame(event)
+
+            deadline = time.monotonic() + max_duration if max_duration else float("inf")
+            while True:
+                timeout = min(heartbeat, deadline - time.monotonic())
+                if timeout <= 0:
+                    return
+                if subscription.overflowed and subscription.queue.empty():
+                    return
+                if getter is None:
+                    getter = asyncio.create_task(subscription.queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=timeout)
+                if not done:
+                    if time.monotonic() < deadline:
+                        yield b": ping\n\n"
+                    continue
+                event, getter = getter.result(), None
+                # Events a catch-up from Mongo already delivered
+                if event[0] in sent:
+                    continue
+                if self._visible(event, include_spam):
+                    yield _frame(event)
+        finally:
+            self._subscriptions.discard(subscription)
+            if getter is not None:
+                getter.cancel()
+
+    @staticmethod
+    def _visible(event: Event, include_spam: bool) -> bool:
+        return include_spam or event[1] != "message" or event[2].get("status") != "spam"
@@ -0,0 +1,233 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Request-path collectors are only touched from the event loop thread, so they
+# use plain dict/list updates without locks. Mongo command collectors run on
+# Motor's executor threads, where a rare concurrent update can drop a sample;
+# that is acceptable for monitoring. Pool gauges would drift permanently from a
+# lost update, so they take a lock, but only on connection events.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds spent in Mongo commands by the current request. Motor copies the
+# context into its executor threads, so the command listener sees this too.
+request_db_time: ContextVar[Optional[List[float]]] = ContextVar("request_db_time", default=None)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        return dict(self._values)
+
+    def render(self, kind: str = "counter") -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {kind}"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._lock = threading.Lock()
+
+    def set(self, *label_values: str, value: float):
+        self._values[label_values] = value
+
+    def add_threadsafe(self, *label_values: str, amount: float):
+        with self._lock:
+            self.inc(*label_values, amount=amount)
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self, kind: str = "gauge") -> List[str]:
+        return super().render(kind)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        REGISTRY.append(self)
+
+    def observe(self, *label_values: str, value: float):
+        state = self._values.get(label_values)
+        if state is None:
+            state = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labels, label_values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {state[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: list = []
+
+http_requests_total = Counter("http_requests_total", "HTTP requests by route, method and status.", ["route", "method", "status"])
+http_request_duration = Histogram("http_request_duration_seconds", "Total time spent serving a request.", ["route", "method"])
+http_request_handler_duration = Histogram("http_request_handler_seconds", "Time spent outside Mongo while serving a request.", ["route", "method"])
+http_request_db_duration = Histogram("http_request_db_seconds", "Time spent in Mongo commands while serving a request.", ["route", "method"])
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being served.")
+http_server_errors_total = Counter("http_server_errors_total", "HTTPExceptions raised with a 5xx status, by route and detail.", ["route", "detail"])
+mongo_command_duration = Histogram("mongo_command_duration_seconds", "Mongo command round trips by command name.", ["command"])
+mongo_command_failures_total = Counter("mongo_command_failures_total", "Failed Mongo commands by command name.", ["command"])
+mongo_pool_connections = Gauge("mongo_pool_connections", "Open connections in the Motor connection pool, by server.", ["address"])
+mongo_pool_checked_out = Gauge("mongo_pool_checked_out", "Connections checked out of the Motor connection pool, by server.", ["address"])
+contact_notifications_total = Counter("contact_notifications_total", "Contact messages by notification outcome (sent, failed, dropped).", ["outcome"])
+log_records_dropped_total = Counter("log_records_dropped_total", "Log records dropped because the logging queue was full.")
+
+
+def route_label(scope: Scope) -> str:
+    # The router stores the matched route in the scope; unmatched paths share one label
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Records per-route request counts and latency, split into Mongo and non-Mongo time."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        db_time = [0.0]
+        token = request_db_time.set(db_time)
+        http_requests_in_flight.inc(amount=1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.inc(amount=-1)
+            request_db_time.reset(token)
+            route, method = route_label(scope), scope["method"]
+            http_requests_total.inc(route, method, str(status))
+            http_request_duration.observe(route, method, value=duration)
+            http_request_db_duration.observe(route, method, value=db_time[0])
+            http_request_handler_duration.observe(route, method, value=max(duration - db_time[0], 0.0))
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        mongo_command_failures_total.inc(event.command_name)
+        self._record(event)
+
+    @staticmethod
+    def _record(event):
+        seconds = event.duration_micros / 1e6
+        mongo_command_duration.observe(event.command_name, value=seconds)
+        db_time = request_db_time.get()
+        if db_time is not None:
+            db_time[0] += seconds
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.add_threadsafe(_address(event), amount=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.add_threadsafe(_address(event), amount=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        mongo_pool_checked_out.add_threadsafe(_address(event), amount=1)
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.add_threadsafe(_address(event), amount=-1)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+def mongo_event_listeners() -> list:
+    """Listeners to pass to the Motor client so Mongo time and pool usage are recorded."""
+    return [CommandMetricsListener(), PoolMetricsListener()]
@@ -1,8 +1,13 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, model_validator
+from typing import Dict, List, Literal, Optional, get_args
 from datetime import datetime
 import uuid
 
+# Statuses a contact message can have; "spam" is assigned on submission by the
+# duplicate filter and can be set or cleared by an admin like any other
+MessageStatus = Literal["new", "read", "responded", "spam"]
+MESSAGE_STATUSES = get_args(MessageStatus)
+
 # Contact Form Models
 class ContactMessageCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100, description="Full name")
@@ -17,7 +22,7 @@ class ContactMessage(BaseModel):
     subject: str
     message: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    status: str = Field(default="new", description="Status: new, read, responded")
+    status: str = Field(default="new", description="Status: new, read, responded, spam")
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
 
@@ -26,7 +31,31 @@ class ContactMessageResponse(BaseModel):
     message: str
     id: str
 
-# Portfolio Data Models (for future use)
+class BulkStatusFilter(BaseModel):
+    status: Optional[MessageStatus] = Field(None, description="Only update messages currently in this status")
+    since: Optional[datetime] = Field(None, description="Only update messages received at or after this time")
+    until: Optional[datetime] = Field(None, description="Only update messages received before this time")
+
+class BulkStatusUpdate(BaseModel):
+    status: MessageStatus
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=1000, description="Message ids to update")
+    filter: Optional[BulkStatusFilter] = Field(None, description="Update every message matching this filter")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of ids or filter")
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError("filter must set at least one of status, since or until")
+        return self
+
+class BulkStatusUpdateResponse(BaseModel):
+    success: bool
+    matched_count: int
+    modified_count: int
+    results: Optional[Dict[str, Literal["updated", "unchanged", "not_found"]]] = None
+
+# Portfolio Data Models
 class PersonalInfo(BaseModel):
     name: str
     title: str
@@ -84,6 +113,13 @@ class Education(BaseModel):
     gpa: Optional[str] = None
     achievements: Optional[List[str]] = None
 
+class Involvement(BaseModel):
+    role: str
+    organization: str
+    duration: str
+    description: str
+    activities: List[str]
+
 class PortfolioData(BaseModel):
     personal: PersonalInfo
     about: About
@@ -92,4 +128,5 @@ class PortfolioData(BaseModel):
     experience: List[Experience]
     education: List[Education]
     certifications: List[str]
-    achievements: Optional[List[str]] = None
\ No newline at end of file
+    achievements: Optional[List[str]] = None
+    involvement: Optional[List[Involvement]] = None
\ No newline at end of file
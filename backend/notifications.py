@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import smtplib
+import ssl
+from email.message import EmailMessage
+from typing import List, Optional, Sequence
+
+from metrics import contact_notifications_total
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSender:
+    """Sends email with the blocking smtplib client; call it from a worker thread.
+
+    `security` is "starttls" (upgrade a plain connection), "tls" (implicit TLS,
+    usually port 465) or "none" (local relays and the test sink).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        security: str = "starttls",
+        timeout: float = 10.0,
+    ):
+        if security not in ("starttls", "tls", "none"):
+            raise ValueError(f"Unknown SMTP security mode: {security}")
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.security = security
+        self.timeout = timeout
+
+    def send(self, message: EmailMessage):
+        if self.security == "tls":
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        with smtp:
+            if self.security == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(message)
+
+
+def _header_value(value: str) -> str:
+    # Visitor input must not add header lines; EmailMessage rejects CR/LF outright
+    return " ".join(value.splitlines())
+
+
+def build_digest(documents: List[dict], sender: str, recipients: Sequence[str]) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = ", ".join(recipients)
+    if len(documents) == 1:
+        document = documents[0]
+        message["Subject"] = _header_value(f"New contact message: {document['subject']}")
+        message["Reply-To"] = _header_value(document["email"])
+    else:
+        message["Subject"] = f"{len(documents)} new contact messages"
+
+    sections = []
+    for document in documents:
+        sections.append(
+            f"From: {document['name']} <{document['email']}>\n"
+            f"Subject: {document['subject']}\n"
+            f"Received: {document['timestamp'].strftime('%Y-%m-%d %H:%M:%S')} UTC\n"
+            f"Id: {document['id']}\n\n"
+            f"{document['message']}\n"
+        )
+    message.set_content(("\n" + "-" * 40 + "\n\n").join(sections))
+    return message
+
+
+class ContactNotifier:
+    """Collects stored contact messages and emails them as digests from a background task.
+
+    `notify()` never blocks: it drops the job (the message is in Mongo either
+    way) when `max_pending` jobs are already waiting. The first job after an
+    idle period opens a digest window of `digest_window` seconds; everything
+    that arrives within it goes out in one email, up to `max_batch` messages.
+    Failed sends are retried with exponential backoff, then dropped.
+    """
+
+    def __init__(
+        self,
+        sender: SMTPSender,
+        from_address: str,
+        recipients: Sequence[str],
+        digest_window: float = 60.0,
+        max_batch: int = 50,
+        max_pending: int = 1000,
+        max_attempts: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.sender = sender
+        self.from_address = from_address
+        self.recipients = list(recipients)
+        self.digest_window = digest_window
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Ends the digest window early, when a full batch is waiting or on shutdown
+        self._wake = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self, document: dict):
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            contact_notifications_total.inc("dropped")
+            logger.warning(f"Notification queue is full, not notifying about message {document['id']}")
+            return
+        if self._queue.qsize() >= self.max_batch:
+            self._wake.set()
+
+    async def stop(self, timeout: float = 10.0):
+        """Send whatever is pending as a final digest, giving up after `timeout` seconds."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wake.set()
+        try:
+            # Wakes the worker if it is idle; a full queue means it is not
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Gave up on {self._queue.qsize()} pending contact notifications at shutdown")
+        self._task = None
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if not self._closing:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.digest_window)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [first] if first is not None else []
+            while len(batch) < self.max_batch and not self._queue.empty():
+                document = self._queue.get_nowait()
+                if document is not None:
+                    batch.append(document)
+            if batch:
+                await self._send(batch)
+            if self._closing and self._queue.empty():
+                return
+
+    async def _send(self, batch: List[dict]):
+        try:
+            message = build_digest(batch, self.from_address, self.recipients)
+        except Exception as e:
+            # Never let one batch stop the worker
+            contact_notifications_total.inc("failed", amount=len(batch))
+            logger.error(f"Could not build contact digest of {len(batch)} messages: {str(e)}")
+            return
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await asyncio.to_thread(self.sender.send, message)
+                contact_notifications_total.inc("sent", amount=len(batch))
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    break
+                backoff = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+                logger.warning(f"Sending contact digest failed (attempt {attempt}), retrying in {backoff:.1f}s: {str(e)}")
+                await asyncio.sleep(backoff)
+        contact_notifications_total.inc("failed", amount=len(batch))
+        logger.error(f"Giving up on contact digest of {len(batch)} messages after {self.max_attempts} attempts")
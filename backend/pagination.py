@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+# Sort order shared by the listing query and the compound index backing it.
+# `id` breaks ties between messages stored within the same timestamp.
+MESSAGE_SORT = [("timestamp", -1), ("id", -1)]
+
+
+def encode_cursor(timestamp: datetime, message_id: str) -> str:
+    """Encode the (timestamp, id) of the last item on a page as an opaque token."""
+    payload = json.dumps({"ts": timestamp.isoformat(), "id": message_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["ts"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_filter(cursor: Optional[str], base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the Mongo filter selecting everything strictly after `cursor`.
+
+    The filter is a seek on the (timestamp desc, id desc) index, so every page
+    costs the same regardless of how deep into the collection it is.
+    """
+    query = dict(base or {})
+    if cursor:
+        timestamp, message_id = decode_cursor(cursor)
+        seek = {
+            "$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": message_id}},
+            ]
+        }
+        query = {"$and": [query, seek]} if query else seek
+    return query
+
+
+def next_cursor(page: list, limit: int) -> Optional[str]:
+    """Return the cursor for the following page, or None when `page` is the last one.
+
+    Callers fetch `limit + 1` documents; the extra one only signals that more exist.
+    """
+    if len(page) <= limit:
+        return None
+    last = page[limit - 1]
+    return encode_cursor(last["timestamp"], last["id"])
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from database import create_client, mongo_settings
+from models import PortfolioData
+from portfolio_index import PortfolioIndex
+from structured_logging import TEXT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# The portfolio is a single document in the `portfolio` collection
+PORTFOLIO_DOCUMENT_ID = "default"
+
+
+class PortfolioStore:
+    """Serves the portfolio document from pre-serialized JSON bytes held in memory.
+
+    The stored document carries a `version` counter that is incremented on
+    every update. This process refreshes its copy immediately after its own
+    updates, and otherwise compares versions with Mongo at most once per
+    `revalidate_interval` seconds so that other workers' updates are picked up.
+
+    Projects and experience are also kept in inverted indexes for the filtered
+    endpoints; each reload only re-indexes the items that changed.
+    """
+
+    def __init__(self, collection, revalidate_interval: float = 30.0):
+        self.collection = collection
+        self.revalidate_interval = revalidate_interval
+        self.version: Optional[int] = None
+        self.data: Optional[PortfolioData] = None
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.projects = PortfolioIndex(
+            keyword_fields=("title", "description", "features", "technologies", "category", "metrics"),
+            category_field="category",
+        )
+        self.experience = PortfolioIndex(
+            keyword_fields=("company", "role", "location", "description", "achievements", "technologies"),
+        )
+        self._next_check = 0.0
+
+    def _set(self, document: Optional[dict]):
+        if document is None:
+            self.version = self.data = self.body = self.etag = None
+            self.projects.update([])
+            self.experience.update([])
+            return
+        self.data = PortfolioData.model_validate(document["data"])
+        self.body = self.data.model_dump_json().encode()
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.version = document["version"]
+        self.projects.update([project.model_dump(mode="json") for project in self.data.projects])
+        self.experience.update([experience.model_dump(mode="json") for experience in self.data.experience])
+
+    async def load(self):
+        self._next_check = time.monotonic() + self.revalidate_interval
+        self._set(await self.collection.find_one({"_id": PORTFOLIO_DOCUMENT_ID}))
+
+    async def revalidate(self):
+        """Reload the document if another process has bumped its version since the last check."""
+        if time.monotonic() < self._next_check:
+            return
+        # Push the deadline forward first so concurrent requests don't all query
+        self._next_check = time.monotonic() + self.revalidate_interval
+        current = await self.collection.find_one({"_id": PORTFOLIO_DOCUMENT_ID}, {"version": 1})
+        if (current or {}).get("version") != self.version:
+            await self.load()
+
+    async def update(self, data: PortfolioData) -> int:
+        document = await self.collection.find_one_and_update(
+            {"_id": PORTFOLIO_DOCUMENT_ID},
+            {"$set": {"data": data.model_dump()}, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self._set(document)
+        return self.version
+
+
+async def _seed(path: str):
+    with open(path, encoding="utf-8") as f:
+        data = PortfolioData.model_validate(json.load(f))
+    mongo_url, db_name = mongo_settings()
+    client = create_client(mongo_url)
+    try:
+        version = await PortfolioStore(client[db_name].portfolio).update(data)
+        print(f"Stored portfolio document version {version}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # Load a portfolio JSON file into Mongo. To export the frontend's mock data:
+    #   node --input-type=module -e "import d from './frontend/src/mock.js'; console.log(JSON.stringify(d))" > portfolio.json
+    parser = argparse.ArgumentParser(description="Manage the stored portfolio document")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    seed = subparsers.add_parser("seed", help="Store a portfolio JSON file, bumping its version")
+    seed.add_argument("path")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT)
+    asyncio.run(_seed(args.path))
@@ -0,0 +1,209 @@
+import re
+from collections import defaultdict
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from search import tokenize
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+         ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+         ("dec", "december")],
+        start=1,
+    )
+    for name in names
+}
+
+# End of a range that is still running
+ONGOING = frozenset(("present", "current", "continued", "ongoing", "now"))
+
+_RANGE_SEPARATOR_RE = re.compile(r"\s*[–—-]\s*|\s+to\s+")
+_MONTH_YEAR_RE = re.compile(r"^(?:([a-z]+)\.?\s+)?(\d{4})$")
+_NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)*")
+
+SORT_FIELDS = ("duration", "metric:<name>")
+
+
+def _month(text: str, end: bool) -> Optional[int]:
+    # Months since year 0; a bare year starts in January and ends in December
+    match = _MONTH_YEAR_RE.match(text)
+    if match is None:
+        return None
+    month_name, year = match.groups()
+    if month_name is None:
+        month = 12 if end else 1
+    elif month_name in MONTHS:
+        month = MONTHS[month_name]
+    else:
+        return None
+    return int(year) * 12 + month - 1
+
+
+def parse_duration(duration: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """Parse "May 2024 – Jul 2024", "2023 - 2024" or "Aug 2024 - Present" into
+    (start month, end month or None while ongoing); None if it isn't a date range."""
+    if not duration:
+        return None
+    parts = _RANGE_SEPARATOR_RE.split(duration.strip().lower(), maxsplit=1)
+    start = _month(parts[0], end=False)
+    if start is None:
+        return None
+    if len(parts) == 1:
+        return start, start
+    if parts[1] in ONGOING:
+        return start, None
+    end = _month(parts[1], end=True)
+    return (start, end) if end is not None and end >= start else None
+
+
+def duration_months(span: Optional[Tuple[int, Optional[int]]], today: date) -> Optional[int]:
+    if span is None:
+        return None
+    start, end = span
+    if end is None:
+        end = today.year * 12 + today.month - 1
+    return max(end - start + 1, 1)
+
+
+def metric_value(value: Any) -> Optional[float]:
+    """The first number in a metric such as "98% login success rate" or "500+ queries"."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value))
+    return float(match.group().replace(",", "")) if match else None
+
+
+def _text(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _text(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _text(item)
+
+
+class PortfolioIndex:
+    """Inverted indexes over one list of portfolio items (projects or experience).
+
+    Technology, category and keyword filters intersect the posting sets of
+    the requested values, smallest first, so a query touches only candidate
+    ids rather than every item. Sort keys are computed when an item is
+    indexed; `update` re-indexes only the items whose content changed.
+    """
+
+    def __init__(self, keyword_fields: Tuple[str, ...], category_field: Optional[str] = None):
+        self.keyword_fields = keyword_fields
+        self.category_field = category_field
+        # Item dicts in portfolio order, by id
+        self.items: Dict[int, dict] = {}
+        self._by_technology: Dict[str, Set[int]] = defaultdict(set)
+        self._by_category: Dict[str, Set[int]] = defaultdict(set)
+        self._by_token: Dict[str, Set[int]] = defaultdict(set)
+        # id -> (technology keys, category key, tokens), to undo an item's postings
+        self._keys: Dict[int, Tuple[Tuple[str, ...], Optional[str], Tuple[str, ...]]] = {}
+        # id -> (duration span, {metric name: value})
+        self._sort_keys: Dict[int, Tuple[Optional[Tuple[int, Optional[int]]], Dict[str, float]]] = {}
+        self._position: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def update(self, items: List[dict]) -> int:
+        """Make the index match `items`; returns the number of items (re)indexed or removed."""
+        changed = 0
+        current = {item["id"]: item for item in items}
+        for item_id in [item_id for item_id in self.items if item_id not in current]:
+            self._remove(item_id)
+            changed += 1
+        for item_id, item in current.items():
+            if self.items.get(item_id) != item:
+                self._remove(item_id)
+                self._add(item)
+                changed += 1
+        # Keep portfolio order, for unsorted results
+        self.items = {item_id: self.items[item_id] for item_id in current}
+        self._position = {item_id: position for position, item_id in enumerate(current)}
+        return changed
+
+    def _add(self, item: dict):
+        item_id = item["id"]
+        technologies = tuple(dict.fromkeys(technology.lower() for technology in item.get("technologies", [])))
+        category = item.get(self.category_field) if self.category_field else None
+        category = category.lower() if category else None
+        tokens = tuple({token for field in self.keyword_fields for text in _text(item.get(field)) for token in tokenize(text)})
+        for technology in technologies:
+            self._by_technology[technology].add(item_id)
+        if category:
+            self._by_category[category].add(item_id)
+        for token in tokens:
+            self._by_token[token].add(item_id)
+        self._keys[item_id] = (technologies, category, tokens)
+        metrics = {name: number for name, value in (item.get("metrics") or {}).items() if (number := metric_value(value)) is not None}
+        self._sort_keys[item_id] = (parse_duration(item.get("duration")), metrics)
+        self.items[item_id] = item
+
+    def _remove(self, item_id: int):
+        keys = self._keys.pop(item_id, None)
+        if keys is None:
+            return
+        technologies, category, tokens = keys
+        for postings, values in ((self._by_technology, technologies), (self._by_category, (category,) if category else ()), (self._by_token, tokens)):
+            for value in values:
+                ids = postings.get(value)
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del postings[value]
+        self._sort_keys.pop(item_id, None)
+        self.items.pop(item_id, None)
+
+    def query(
+        self,
+        technologies: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        keyword: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = True,
+        today: Optional[date] = None,
+    ) -> List[dict]:
+        """Items using every one of `technologies`, in `category`, and containing every keyword token."""
+        postings: List[Set[int]] = []
+        for technology in technologies or []:
+            postings.append(self._by_technology.get(technology.lower(), set()))
+        if category:
+            postings.append(self._by_category.get(category.lower(), set()))
+        # A keyword of only stopwords doesn't narrow anything
+        for token in tokenize(keyword or ""):
+            postings.append(self._by_token.get(token, set()))
+
+        if postings:
+            postings.sort(key=len)
+            matches = set(postings[0])
+            for ids in postings[1:]:
+                if not matches:
+                    break
+                matches &= ids
+        else:
+            matches = self.items.keys()
+
+        ids = sorted(matches, key=self._position.__getitem__)
+        if sort:
+            key = self._sort_key(sort, today or date.today())
+            # Items without a value for the key go last in either order
+            present = [item_id for item_id in ids if key(item_id) is not None]
+            missing = [item_id for item_id in ids if key(item_id) is None]
+            present.sort(key=key, reverse=descending)
+            ids = present + missing
+        return [self.items[item_id] for item_id in ids]
+
+    def _sort_key(self, sort: str, today: date) -> Callable[[int], Optional[float]]:
+        if sort == "duration":
+            return lambda item_id: duration_months(self._sort_keys[item_id][0], today)
+        name = sort.removeprefix("metric:")
+        if name != sort and name:
+            return lambda item_id: self._sort_keys[item_id][1].get(name)
+        raise ValueError(f"Unknown sort {sort!r}, expected one of {', '.join(SORT_FIELDS)}")
@@ -0,0 +1,213 @@
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import request_db_time, route_label
+from structured_logging import request_context
+
+
+class PhaseTimer:
+    """Splits one request's time into consecutive phases, plus optional named spans inside them."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.spans: Dict[str, float] = {}
+
+    def mark(self, phase: str):
+        """Attribute the time since the previous mark to `phase`."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+
+request_phases: ContextVar[Optional[PhaseTimer]] = ContextVar("request_phases", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block inside a handler, reported next to the phases of slow requests."""
+    timer = request_phases.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.spans[name] = timer.spans.get(name, 0.0) + time.perf_counter() - start
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that marks the phases FastAPI goes through for each request.
+
+    "middleware" runs until the route is reached, "parse" covers reading the
+    body and validating parameters, "handler" is the endpoint itself, and
+    "serialize" is response model validation and encoding.
+    """
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed_call(**values):
+                timer = request_phases.get()
+                if timer is not None:
+                    timer.mark("parse")
+                try:
+                    return await call(**values)
+                finally:
+                    if timer is not None:
+                        timer.mark("handler")
+
+            self.dependant.call = timed_call
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timer = request_phases.get()
+            if timer is not None:
+                timer.mark("middleware")
+            response = await handler(request)
+            if timer is not None:
+                timer.mark("serialize")
+            return response
+
+        return timed_handler
+
+
+class SlowRequestLog:
+    """The last `capacity` requests that took at least `threshold` seconds."""
+
+    def __init__(self, threshold: float = 0.5, capacity: int = 200):
+        self.threshold = threshold
+        self.entries: Deque[dict] = deque(maxlen=capacity)
+
+    def recent(self, limit: Optional[int] = None) -> List[dict]:
+        entries = list(reversed(self.entries))
+        return entries[:limit] if limit else entries
+
+
+class SlowRequestMiddleware:
+    """Records a per-phase timing breakdown of requests slower than the log's threshold.
+
+    Must run inside MetricsMiddleware, which collects the request's Mongo time.
+    "send" is the time from the response headers to the last body chunk. For
+    streaming responses (the live feed, exports) timing stops at the first body
+    chunk: how long the client keeps the stream open isn't request latency.
+    """
+
+    def __init__(self, app: ASGIApp, log: SlowRequestLog):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = PhaseTimer()
+        status = 500
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            recorded = True
+            timer.mark("send")
+            duration = time.perf_counter() - timer.started
+            if duration < self.log.threshold:
+                return
+            db_time = request_db_time.get()
+            context = request_context.get()
+            self.log.entries.append({
+                "time": datetime.utcnow(),
+                "request_id": context["id"] if context else None,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_label(scope),
+                "status": status,
+                "duration_ms": round(duration * 1000, 3),
+                "phases_ms": {phase: round(seconds * 1000, 3) for phase, seconds in timer.phases.items()},
+                "spans_ms": {name: round(seconds * 1000, 3) for name, seconds in timer.spans.items()},
+                # Included in the handler phase (and parse/serialize, for database-backed dependencies)
+                "db_ms": round(db_time[0] * 1000, 3) if db_time is not None else None,
+            })
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timer.mark("response")
+            await send(message)
+            if message["type"] == "http.response.body" and message.get("more_body") and not recorded:
+                record()
+
+        token = request_phases.set(timer)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_phases.reset(token)
+            if not recorded:
+                record()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename
+    # Keep the path short but unambiguous: package/module.py
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples thread stacks at a fixed interval and aggregates them as collapsed stacks.
+
+    The output is one line per distinct stack, root first, frames separated by
+    ";" and followed by a space and the sample count: the input format of
+    flamegraph.pl, speedscope and similar tools. Only one profile runs at a time.
+    """
+
+    def __init__(self, max_seconds: float = 30.0):
+        self.max_seconds = max_seconds
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, interval: float, thread_ids: Optional[List[int]] = None) -> str:
+        """Sample for `seconds` on a background thread; `thread_ids` of None samples every other thread."""
+        seconds = min(seconds, self.max_seconds)
+        async with self._lock:
+            stacks = await asyncio.to_thread(self._sample, seconds, interval, thread_ids)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def _sample(seconds: float, interval: float, thread_ids: Optional[List[int]]) -> Counter:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (thread_ids is not None and thread_id not in thread_ids):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        return stacks
@@ -0,0 +1,131 @@
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, rule: str, retry_after: int):
+        super().__init__(f"Rate limit exceeded for {rule}")
+        self.rule = rule
+        self.retry_after = retry_after
+
+
+def parse_limit(value: str) -> Optional[Tuple[int, int]]:
+    """Parse a "<requests>/<seconds>" limit such as "5/60". Empty values disable the rule."""
+    if not value:
+        return None
+    count, _, seconds = value.partition("/")
+    return int(count), int(seconds)
+
+
+class MemoryRateLimitBackend:
+    """Per-process counters for the current and previous window of each key.
+
+    Each check is a dict lookup, and at most `max_keys` keys are kept: the
+    least recently seen keys are evicted first, which only ever forgets
+    clients that have gone quiet.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> [window index, current window count, previous window count]
+        self._windows: "OrderedDict[str, list]" = OrderedDict()
+
+    def _state(self, key: str, window_index: int) -> list:
+        state = self._windows.get(key)
+        if state is None:
+            state = self._windows[key] = [window_index, 0, 0]
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+            if state[0] != window_index:
+                # Roll forward; a gap of more than one window means both counts have expired
+                state[2] = state[1] if state[0] == window_index - 1 else 0
+                state[0], state[1] = window_index, 0
+        return state
+
+    async def counts(self, key: str, window_index: int) -> Tuple[int, int]:
+        state = self._state(key, window_index)
+        return state[1], state[2]
+
+    async def record(self, keys: Dict[str, Tuple[int, int]]):
+        for key, (window_index, _) in keys.items():
+            self._state(key, window_index)[1] += 1
+
+
+class MongoRateLimitBackend:
+    """Window counters stored in Mongo so all workers share one budget per key.
+
+    Counter documents expire through a TTL index two windows after they start.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+
+    async def counts(self, key: str, window_index: int) -> Tuple[int, int]:
+        ids = {f"{key}:{window_index}": 0, f"{key}:{window_index - 1}": 1}
+        counts = [0, 0]
+        async for document in self.collection.find({"_id": {"$in": list(ids)}}):
+            counts[ids[document["_id"]]] = document["count"]
+        return counts[0], counts[1]
+
+    async def record(self, keys: Dict[str, Tuple[int, int]]):
+        operations = []
+        for key, (window_index, window) in keys.items():
+            expires_at = datetime.utcnow() + timedelta(seconds=2 * window)
+            operations.append(UpdateOne(
+                {"_id": f"{key}:{window_index}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True,
+            ))
+        await self.collection.bulk_write(operations, ordered=False)
+
+
+class RateLimiter:
+    """Sliding-window limits approximated from fixed-window counters.
+
+    The estimate for a key is the current window's count plus the previous
+    window's count weighted by how much of it still overlaps the sliding
+    window. A request is only counted against its keys once it has passed
+    every rule.
+    """
+
+    def __init__(self, backend, rules: Dict[str, Optional[Tuple[int, int]]]):
+        self.backend = backend
+        self.rules = {name: rule for name, rule in rules.items() if rule is not None}
+
+    async def check(self, **keys: Optional[str]):
+        now = time.time()
+        to_record = {}
+        for name, (limit, window) in self.rules.items():
+            value = keys.get(name)
+            if not value:
+                continue
+            window_index = int(now // window)
+            elapsed = now - window_index * window
+            key = f"{name}:{value}"
+            current, previous = await self.backend.counts(key, window_index)
+            weight = 1 - elapsed / window
+            if current + previous * weight >= limit:
+                raise RateLimitExceeded(name, self._retry_after(limit, window, elapsed, current, previous))
+            to_record[key] = (window_index, window)
+        if to_record:
+            await self.backend.record(to_record)
+
+    @staticmethod
+    def _retry_after(limit: int, window: int, elapsed: float, current: int, previous: int) -> int:
+        if current >= limit or previous == 0:
+            # Nothing frees up before the next window starts
+            wait = window - elapsed
+        else:
+            # Wait until the previous window's weighted share drops below the remaining budget
+            wait = window * (1 - (limit - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from database import create_client, mongo_settings
+from serialization import dumps
+from structured_logging import TEXT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Fields dropped by PII scrubbing; the message itself is kept
+PII_FIELDS = ("ip_address", "user_agent")
+
+# Matches any status in a policy
+ANY_STATUS = "*"
+
+
+def parse_days(spec: str) -> Dict[str, int]:
+    """Parse "spam=30,responded=365,*=730" into {status: days}; empty disables."""
+    days: Dict[str, int] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        status, _, value = item.partition("=")
+        if not value:
+            raise ValueError(f"Expected <status>=<days>, got {item!r}")
+        days[status.strip()] = int(value)
+    return days
+
+
+@dataclass
+class RetentionPolicy:
+    """Ages in days, per status ("*" for any status not listed).
+
+    `delete_after`: messages are deleted outright. `scrub_after`: PII fields
+    are cleared. `archive_after`: messages of any status are moved out of the
+    hot collection.
+    """
+
+    delete_after: Dict[str, int] = field(default_factory=dict)
+    scrub_after: Dict[str, int] = field(default_factory=dict)
+    archive_after: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        archive_after = os.environ.get("RETENTION_ARCHIVE_AFTER_DAYS", "")
+        return cls(
+            delete_after=parse_days(os.environ.get("RETENTION_DELETE_AFTER", "")),
+            scrub_after=parse_days(os.environ.get("RETENTION_SCRUB_PII_AFTER", "")),
+            archive_after=int(archive_after) if archive_after else None,
+        )
+
+
+def _status_filters(days_by_status: Dict[str, int], now: datetime) -> List[Dict[str, Any]]:
+    # One filter per listed status, plus one for every other status when "*" is given
+    filters = [
+        {"status": status, "timestamp": {"$lt": now - timedelta(days=days)}}
+        for status, days in days_by_status.items()
+        if status != ANY_STATUS
+    ]
+    if ANY_STATUS in days_by_status:
+        listed = [status for status in days_by_status if status != ANY_STATUS]
+        filters.append({
+            "status": {"$nin": listed},
+            "timestamp": {"$lt": now - timedelta(days=days_by_status[ANY_STATUS])},
+        })
+    return filters
+
+
+class FileArchive:
+    """Appends messages as gzip-compressed NDJSON, one file per UTC day.
+
+    Files live under `directory/YYYY/MM/YYYY-MM-DD.ndjson.gz`. Each batch is
+    written as its own gzip member, which `gzip`/`zcat` read back as one stream.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, day: datetime) -> Path:
+        return self.directory / day.strftime("%Y") / day.strftime("%m") / f"{day.strftime('%Y-%m-%d')}.ndjson.gz"
+
+    def _write(self, documents: List[dict]):
+        by_day: Dict[Path, List[bytes]] = defaultdict(list)
+        for document in documents:
+            by_day[self._path(document["timestamp"])].append(dumps(document) + b"\n")
+        for path, lines in by_day.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "ab") as f:
+                f.write(gzip.compress(b"".join(lines), mtime=0))
+                f.flush()
+                # Durable before the messages are deleted from Mongo
+                os.fsync(f.fileno())
+
+    async def write(self, documents: List[dict]):
+        await asyncio.to_thread(self._write, documents)
+
+
+class CollectionArchive:
+    """Copies messages into a cold collection; re-archiving a message is a no-op."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def write(self, documents: List[dict]):
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Already archived by a run that stopped before deleting them from the hot collection
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+            if errors or e.details.get("writeConcernErrors"):
+                raise
+
+
+async def delete_expired(collection, policy: RetentionPolicy, now: datetime, dry_run: bool = False) -> int:
+    deleted = 0
+    for query in _status_filters(policy.delete_after, now):
+        if dry_run:
+            deleted += await collection.count_documents(query)
+        else:
+            deleted += (await collection.delete_many(query)).deleted_count
+    return deleted
+
+
+async def scrub_pii(collection, policy: RetentionPolicy, now: datetime, dry_run: bool = False) -> int:
+    scrubbed = 0
+    for query in _status_filters(policy.scrub_after, now):
+        # Only messages that still carry PII, so repeated runs touch nothing
+        query = {**query, "$or": [{name: {"$ne": None}} for name in PII_FIELDS]}
+        if dry_run:
+            scrubbed += await collection.count_documents(query)
+        else:
+            result = await collection.update_many(query, {"$set": {name: None for name in PII_FIELDS}})
+            scrubbed += result.modified_count
+    return scrubbed
+
+
+async def archive_old(collection, archive, policy: RetentionPolicy, now: datetime, batch_size: int = 500, dry_run: bool = False) -> int:
+    """Move messages older than `archive_after` days into `archive`, oldest first, in batches.
+
+    Each batch is written to the archive before it is deleted from the hot
+    collection, so an interrupted run can only leave a message in both places.
+    """
+    if policy.archive_after is None:
+        return 0
+    query = {"timestamp": {"$lt": now - timedelta(days=policy.archive_after)}}
+    if dry_run:
+        return await collection.count_documents(query)
+    moved = 0
+    while True:
+        batch = await collection.find(query, {"_id": 0}).sort("timestamp", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            return moved
+        await archive.write(batch)
+        result = await collection.delete_many({"id": {"$in": [document["id"] for document in batch]}})
+        moved += result.deleted_count
+        logger.info(f"Archived {moved} contact messages so far")
+
+
+async def apply_retention(collection, policy: RetentionPolicy, archive=None, batch_size: int = 500, dry_run: bool = False, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Run deletion, then PII scrubbing, then archival; returns how many messages each step touched."""
+    now = now or datetime.utcnow()
+    # Deleting first avoids archiving or scrubbing messages that are about to go anyway
+    summary = {"deleted": await delete_expired(collection, policy, now, dry_run)}
+    summary["scrubbed"] = await scrub_pii(collection, policy, now, dry_run)
+    summary["archived"] = await archive_old(collection, archive, policy, now, batch_size, dry_run) if archive is not None else 0
+    return summary
+
+
+async def _run(args, policy: RetentionPolicy):
+    mongo_url, db_name = mongo_settings()
+    client = create_client(mongo_url)
+    try:
+        db = client[db_name]
+        archive = None
+        if args.archive_dir:
+            archive = FileArchive(Path(args.archive_dir))
+        elif args.archive_collection:
+            archive = CollectionArchive(db[args.archive_collection])
+            await archive.collection.create_index("id", unique=True)
+        summary = await apply_retention(db.contact_messages, policy, archive, args.batch_size, args.dry_run)
+        prefix = "Would have" if args.dry_run else "Done:"
+        print(f"{prefix} deleted {summary['deleted']}, scrubbed {summary['scrubbed']}, archived {summary['archived']} contact messages")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # Policies come from the environment, e.g.
+    #   RETENTION_DELETE_AFTER="spam=30,responded=365" RETENTION_SCRUB_PII_AFTER="*=90" RETENTION_ARCHIVE_AFTER_DAYS=180
+    parser = argparse.ArgumentParser(description="Apply retention policies to contact_messages")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run = subparsers.add_parser("run", help="Delete, scrub and archive messages per the configured policies")
+    run.add_argument("--dry-run", action="store_true", help="Only count the messages each step would touch, ignoring the earlier steps")
+    run.add_argument("--archive-after", type=int, help="Override RETENTION_ARCHIVE_AFTER_DAYS")
+    target = run.add_mutually_exclusive_group()
+    target.add_argument("--archive-dir", help="Write gzip NDJSON archives, one file per day, under this directory")
+    target.add_argument("--archive-collection", help="Move archived messages into this collection instead")
+    run.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT)
+    policy = RetentionPolicy.from_env()
+    if args.archive_after is not None:
+        policy.archive_after = args.archive_after
+    # Checked before connecting, while the parser is at hand to report it
+    if policy.archive_after is not None and not (args.archive_dir or args.archive_collection):
+        parser.error("archiving needs --archive-dir or --archive-collection")
+    asyncio.run(_run(args, policy))
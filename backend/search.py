@@ -0,0 +1,186 @@
+import math
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import IndexModel, TEXT
+
+from filters import naive_utc
+
+SEARCH_FIELDS = ("name", "email", "subject", "message")
+
+# Text index for the mongo backend; a collection can only have one
+TEXT_INDEX = IndexModel(
+    [(field, TEXT) for field in SEARCH_FIELDS],
+    name="message_text",
+    weights={"subject": 5, "name": 3, "email": 3, "message": 1},
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("a an and are as at be by for from i in is it me my of on or so the this to we with you your".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _document_tokens(document: dict) -> List[str]:
+    tokens = []
+    for field in SEARCH_FIELDS:
+        tokens.extend(tokenize(document.get(field) or ""))
+    # The whole address as well, so searching for an exact sender ranks it first
+    email = (document.get("email") or "").lower()
+    if email:
+        tokens.append(email)
+    return tokens
+
+
+def _query_tokens(query: str) -> List[str]:
+    tokens = tokenize(query)
+    tokens.extend(word for word in query.lower().split() if "@" in word)
+    return list(dict.fromkeys(tokens))
+
+
+def _day(timestamp: datetime) -> str:
+    return timestamp.strftime("%Y-%m-%d")
+
+
+class MemorySearchIndex:
+    """In-process inverted index over contact messages, ranked with BM25.
+
+    Only postings and the metadata needed for filtering and facets are kept;
+    the matching page of messages is fetched from Mongo by id.
+    """
+
+    def __init__(self):
+        # token -> {message id: term frequency}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        # message id -> (status, timestamp, document length, tokens)
+        self._documents: Dict[str, Tuple[str, datetime, int, Tuple[str, ...]]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    async def build(self, collection):
+        projection = {"_id": 0, "id": 1, "status": 1, "timestamp": 1, **{field: 1 for field in SEARCH_FIELDS}}
+        async for document in collection.find({}, projection).batch_size(1000):
+            self.add(document)
+
+    def add(self, document: dict):
+        message_id = document["id"]
+        if message_id in self._documents:
+            self.remove(message_id)
+        counts = Counter(_document_tokens(document))
+        for token, frequency in counts.items():
+            self._postings[token][message_id] = frequency
+        length = sum(counts.values())
+        self._documents[message_id] = (document.get("status", "new"), document["timestamp"], length, tuple(counts))
+        self._total_length += length
+
+    def remove(self, message_id: str):
+        entry = self._documents.pop(message_id, None)
+        if entry is None:
+            return
+        _, _, length, tokens = entry
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(message_id, None)
+                if not postings:
+                    del self._postings[token]
+        self._total_length -= length
+
+    def set_status(self, message_ids: Iterable[str], status: str):
+        for message_id in message_ids:
+            entry = self._documents.get(message_id)
+            if entry is not None:
+                self._documents[message_id] = (status,) + entry[1:]
+
+    def set_status_where(self, status: str, current: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """Mirror a filter-based bulk status update."""
+        since, until = naive_utc(since), naive_utc(until)
+        matched = [
+            message_id for message_id, (entry_status, timestamp, _, _) in self._documents.items()
+            if (current is None or entry_status == current)
+            and (since is None or timestamp >= since)
+            and (until is None or timestamp < until)
+        ]
+        self.set_status(matched, status)
+
+    def search(self, query: str, status: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """Return (ranked (id, score) pairs, status facet, day facet) for every match."""
+        since, until = naive_utc(since), naive_utc(until)
+        count = len(self._documents)
+        average_length = self._total_length / count if count else 0.0
+        scores: Dict[str, float] = defaultdict(float)
+        for token in _query_tokens(query):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for message_id, frequency in postings.items():
+                length = self._documents[message_id][2]
+                norm = K1 * (1 - B + B * length / average_length) if average_length else K1
+                scores[message_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+        ranked = []
+        by_status: Dict[str, int] = defaultdict(int)
+        by_day: Dict[str, int] = defaultdict(int)
+        for message_id, score in scores.items():
+            entry_status, timestamp, _, _ = self._documents[message_id]
+            if (status and entry_status != status) or (since and timestamp < since) or (until and timestamp >= until):
+                continue
+            ranked.append((message_id, score))
+            by_status[entry_status] += 1
+            by_day[_day(timestamp)] += 1
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked, dict(by_status), dict(sorted(by_day.items()))
+
+
+async def search_memory(index: MemorySearchIndex, collection, query: str, filters: Dict[str, Any], skip: int, limit: int) -> Dict[str, Any]:
+    ranked, by_status, by_day = index.search(
+        query, status=filters.get("status"), since=filters.get("since"), until=filters.get("until")
+    )
+    page = ranked[skip:skip + limit]
+    scores = dict(page)
+    documents = await collection.find({"id": {"$in": list(scores)}}, {"_id": 0}).to_list(length=len(page))
+    for document in documents:
+        document["score"] = round(scores[document["id"]], 4)
+    documents.sort(key=lambda document: (-document["score"], document["id"]))
+    return {"total": len(ranked), "hits": documents, "facets": {"status": by_status, "day": by_day}}
+
+
+async def search_mongo(collection, query: str, match: Dict[str, Any], skip: int, limit: int) -> Dict[str, Any]:
+    pipeline = [
+        {"$match": {"$text": {"$search": query}, **match}},
+        {"$facet": {
+            "hits": [
+                {"$addFields": {"score": {"$meta": "textScore"}}},
+                {"$sort": {"score": -1, "id": 1}},
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": {"_id": 0}},
+            ],
+            "total": [{"$count": "count"}],
+            "status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "day": [
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}, "count": {"$sum": 1}}},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]
+    result = (await collection.aggregate(pipeline).to_list(length=1))[0]
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "hits": result["hits"],
+        "facets": {
+            "status": {bucket["_id"]: bucket["count"] for bucket in result["status"]},
+            "day": {bucket["_id"]: bucket["count"] for bucket in result["day"]},
+        },
+    }
@@ -1,33 +1,345 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import threading
 import logging
 from pathlib import Path
-from models import ContactMessageCreate, ContactMessage, ContactMessageResponse
-from datetime import datetime
-import uuid
+# Only what declaring the routes and serving every request needs is imported here: the
+# request/response models (FastAPI reads them from the route signatures), the middleware
+# and the static files. Mongo, search, spam checks, rate limits, the live feed, analytics,
+# exports and pagination are imported by connect_database() or the handlers that use them,
+# so a worker started with STARTUP_MODE=lazy answers the health check and the resume
+# without loading them (see tests/bench/startup.py).
+from models import (
+    ContactMessageCreate, ContactMessage, ContactMessageResponse, PortfolioData,
+    MESSAGE_STATUSES, BulkStatusUpdate, BulkStatusUpdateResponse,
+)
+from static_assets import StaticAssetCache, asset_response
+from serialization import FastJSONResponse
+from http_cache import HTTPCacheMiddleware
+from metrics import MetricsMiddleware, http_server_errors_total, render_metrics, route_label
+from structured_logging import RequestContextMiddleware, configure_logging, parse_sample_rates
+from profiling import SamplingProfiler, SlowRequestLog, SlowRequestMiddleware, TimedRoute, span
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, List, Optional, Set
+
+if TYPE_CHECKING:
+    from analytics import DailyRollups
+    from database import ReadinessProbe
+    from ingest import ContactWriteBehindQueue
+    from live_feed import LiveFeed
+    from portfolio import PortfolioStore
+    from rate_limit import RateLimiter
+    from search import MemorySearchIndex
+    from spam import DuplicateDetector
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection settings; the client is created per worker by connect_database()
+mongo_url = os.environ.get('MONGO_URL')
+DB_NAME = os.environ.get('DB_NAME')
+
+# Per-worker state bound to the Mongo client. It is set up by connect_database() rather
+# than at import time, so workers forked from a preloaded app never share sockets.
+client = None
+db = None
+readiness_probe: Optional["ReadinessProbe"] = None
+portfolio_store: Optional["PortfolioStore"] = None
+contact_queue: Optional["ContactWriteBehindQueue"] = None
+contact_rate_limiter: Optional["RateLimiter"] = None
+message_rollups: Optional["DailyRollups"] = None
+# Created with the client too, since only routes that need Mongo use them
+search_index: Optional["MemorySearchIndex"] = None
+duplicate_detector: Optional["DuplicateDetector"] = None
+live_feed: Optional["LiveFeed"] = None
+
+# Direct (non write-behind) contact inserts still running, awaited on shutdown
+pending_inserts: Set[asyncio.Task] = set()
+
+# Contact message search: "mongo" uses a text index, "memory" keeps an in-process
+# inverted index for deployments where text indexes are unavailable
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "mongo")
+
+# Email digests of new (non-spam) contact messages, sent from a background task.
+# Disabled unless NOTIFY_SMTP_HOST and NOTIFY_TO are set.
+contact_notifier = None
+if os.environ.get("NOTIFY_SMTP_HOST") and os.environ.get("NOTIFY_TO"):
+    # smtplib and the email package are only loaded when notifications are enabled
+    from notifications import ContactNotifier, SMTPSender
+
+    contact_notifier = ContactNotifier(
+        SMTPSender(
+            os.environ["NOTIFY_SMTP_HOST"],
+            port=int(os.environ.get("NOTIFY_SMTP_PORT", "587")),
+            username=os.environ.get("NOTIFY_SMTP_USERNAME"),
+            password=os.environ.get("NOTIFY_SMTP_PASSWORD"),
+            security=os.environ.get("NOTIFY_SMTP_SECURITY", "starttls"),
+        ),
+        from_address=os.environ.get("NOTIFY_FROM", "portfolio@localhost"),
+        recipients=[address.strip() for address in os.environ["NOTIFY_TO"].split(",") if address.strip()],
+        digest_window=float(os.environ.get("NOTIFY_DIGEST_SECONDS", "60")),
+        max_batch=int(os.environ.get("NOTIFY_MAX_BATCH", "50")),
+        max_attempts=int(os.environ.get("NOTIFY_MAX_ATTEMPTS", "5")),
+    )
+
+# Live inbox feed (server-sent events) of new messages and status changes
+LIVE_FEED_SOURCE = os.environ.get("LIVE_FEED_SOURCE", "auto")
+LIVE_FEED_HEARTBEAT_SECONDS = float(os.environ.get("LIVE_FEED_HEARTBEAT_SECONDS", "15"))
+# Streams are closed after this long (clients reconnect with Last-Event-ID), which
+# rebalances them across workers and bounds how long a shutdown waits for them
+LIVE_FEED_MAX_SECONDS = float(os.environ.get("LIVE_FEED_MAX_SECONDS", "300"))
+
+def messages_stored(documents):
+    # Keep in-process state that mirrors contact_messages up to date after inserts
+    try:
+        if search_index is not None:
+            for document in documents:
+                search_index.add(document)
+        if message_rollups is not None:
+            message_rollups.record_inserts(documents)
+        if contact_notifier is not None:
+            for document in documents:
+                if document.get("status") != "spam":
+                    contact_notifier.notify(document)
+        for document in documents:
+            live_feed.publish_local("message", {key: value for key, value in document.items() if key != "_id"})
+    except Exception as e:
+        logger.error(f"Error updating state for stored messages: {str(e)}")
+
+def message_statuses_changed(previous, status):
+    # `previous` holds the id, timestamp and former status of each changed message
+    message_ids = [document["id"] for document in previous]
+    if search_index is not None:
+        search_index.set_status(message_ids, status)
+    if message_rollups is not None:
+        message_rollups.record_status_changes(previous, status)
+    for message_id in message_ids:
+        live_feed.publish_local("status", {"id": message_id, "status": status})
+
+# Duplicate and near-duplicate submissions are either stored with status "spam"
+# (hidden from the default admin listing) or rejected, per SPAM_ACTION
+SPAM_ACTION = os.environ.get("SPAM_ACTION", "flag")
+
+# Optional write-behind mode for contact submissions: messages are acknowledged once
+# queued (and spilled to disk) and written to Mongo in batches by a background task
+CONTACT_WRITE_BEHIND = os.environ.get("CONTACT_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+CONTACT_SPILL_DIR = Path(os.environ.get("CONTACT_SPILL_DIR", ROOT_DIR / "spill"))
+
+# Requests slower than SLOW_REQUEST_THRESHOLD_MS are kept with a per-phase breakdown,
+# and admins can run a time-boxed sampling profiler
+slow_request_log = SlowRequestLog(
+    threshold=float(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", "500")) / 1000,
+    capacity=int(os.environ.get("SLOW_REQUEST_CAPACITY", "200")),
+)
+profiler = SamplingProfiler(max_seconds=float(os.environ.get("PROFILE_MAX_SECONDS", "30")))
+
+# Files under static/ are served from memory and re-checked on disk at most every few seconds
+static_assets = StaticAssetCache(
+    ROOT_DIR / "static",
+    revalidate_interval=float(os.environ.get("STATIC_REVALIDATE_SECONDS", "2")),
+)
+
+# Contact form rate limits, per client IP and per sender email ("<requests>/<seconds>", empty disables).
+# The memory backend is per worker; use the mongo backend when running several workers.
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+
+async def connect_database():
+    """Create the Mongo client and the per-worker state bound to it, then run the startup work that needs Mongo.
+
+    Safe to run again after a failure: state is only created once, and the
+    background tasks are started last, after every step that can raise.
+    """
+    global client, db, readiness_probe, portfolio_store, contact_queue, contact_rate_limiter, message_rollups
+    global search_index, duplicate_detector, live_feed
+    from analytics import DailyRollups
+    from database import ReadinessProbe, client_options, create_client, warm_up
+    from indexes import ensure_indexes
+    from ingest import ContactWriteBehindQueue
+    from live_feed import LiveFeed
+    from portfolio import PortfolioStore
+    from rate_limit import MemoryRateLimitBackend, MongoRateLimitBackend, RateLimiter, parse_limit
+    from search import TEXT_INDEX, MemorySearchIndex
+    from spam import DuplicateDetector
+
+    if client is None:
+        if not DB_NAME:
+            raise RuntimeError("DB_NAME is not set")
+        client = create_client(mongo_url)
+        db = client[DB_NAME]
+        # Cached Mongo ping behind the readiness endpoint
+        readiness_probe = ReadinessProbe(
+            client,
+            ttl=float(os.environ.get("READINESS_CACHE_SECONDS", "5")),
+            timeout=float(os.environ.get("READINESS_TIMEOUT_SECONDS", "2")),
+        )
+        # Portfolio document, served from pre-serialized bytes cached in memory
+        portfolio_store = PortfolioStore(
+            db.portfolio,
+            revalidate_interval=float(os.environ.get("PORTFOLIO_REVALIDATE_SECONDS", "30")),
+        )
+        if RATE_LIMIT_BACKEND == "mongo":
+            rate_limit_backend = MongoRateLimitBackend(db.rate_limits)
+        else:
+            rate_limit_backend = MemoryRateLimitBackend(max_keys=int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000")))
+        contact_rate_limiter = RateLimiter(rate_limit_backend, {
+            "ip": parse_limit(os.environ.get("RATE_LIMIT_PER_IP", "5/60")),
+            "email": parse_limit(os.environ.get("RATE_LIMIT_PER_EMAIL", "3/600")),
+        })
+        # Per-day message counters behind the analytics endpoint
+        message_rollups = DailyRollups(
+            db.contact_stats_daily,
+            flush_interval=float(os.environ.get("ANALYTICS_FLUSH_SECONDS", "5")),
+        )
+        if SEARCH_BACKEND == "memory":
+            search_index = MemorySearchIndex()
+        duplicate_detector = DuplicateDetector(
+            capacity=int(os.environ.get("SPAM_INDEX_CAPACITY", "50000")),
+            max_distance=int(os.environ.get("SPAM_MAX_DISTANCE", "3")),
+        )
+        live_feed = LiveFeed(
+            history=int(os.environ.get("LIVE_FEED_HISTORY", "1000")),
+            client_queue_size=int(os.environ.get("LIVE_FEED_CLIENT_QUEUE", "256")),
+        )
+        if CONTACT_WRITE_BEHIND:
+            # Each worker spills to its own file and replays files left by workers that died
+            contact_queue = ContactWriteBehindQueue(
+                db.contact_messages,
+                spill_dir=CONTACT_SPILL_DIR,
+                max_size=int(os.environ.get("CONTACT_QUEUE_MAX_SIZE", "10000")),
+                batch_size=int(os.environ.get("CONTACT_BATCH_SIZE", "100")),
+                flush_interval=float(os.environ.get("CONTACT_FLUSH_INTERVAL_MS", "50")) / 1000,
+                submit_timeout=float(os.environ.get("CONTACT_SUBMIT_TIMEOUT_MS", "500")) / 1000,
+                fsync=os.environ.get("CONTACT_SPILL_FSYNC", "false").lower() in ("1", "true", "yes"),
+                on_stored=messages_stored,
+            )
+
+    try:
+        elapsed = await warm_up(client, connections=client_options()["minPoolSize"])
+        logger.info(f"Mongo connection pool warmed up in {elapsed * 1000:.1f}ms")
+    except Exception as e:
+        logger.error(f"Error warming up Mongo connection pool: {str(e)}")
+
+    created = await ensure_indexes(db, extra_indexes=[TEXT_INDEX] if SEARCH_BACKEND == "mongo" else [])
+    logger.info(f"contact_messages indexes ready: {', '.join(created)}")
+
+    if search_index is not None:
+        await search_index.build(db.contact_messages)
+        logger.info(f"Search index built over {len(search_index)} messages")
+
+    if isinstance(contact_rate_limiter.backend, MongoRateLimitBackend):
+        await contact_rate_limiter.backend.ensure_indexes()
+
+    try:
+        await portfolio_store.load()
+    except Exception as e:
+        logger.error(f"Error loading portfolio data: {str(e)}")
+
+    # Before anything is recorded (spill replays included), so the counters start from the stored messages
+    try:
+        days = await message_rollups.backfill(db.contact_messages)
+        if days is not None:
+            logger.info(f"Built contact message rollups for {days} days")
+    except Exception as e:
+        logger.error(f"Error building contact message rollups: {str(e)}")
+
+    # Started after the indexes so spill replays are deduplicated by the unique id index
+    if contact_queue is not None:
+        await contact_queue.start()
+
+    try:
+        await live_feed.start(db.contact_messages, source=LIVE_FEED_SOURCE)
+        logger.info(f"Live feed events come from: {live_feed.source}")
+    except Exception as e:
+        logger.error(f"Error starting live feed change stream: {str(e)}")
+
+    message_rollups.start()
+    if contact_notifier is not None:
+        contact_notifier.start()
+
+# STARTUP_MODE=lazy skips connect_database() at startup, for scale-to-zero deployments:
+# the first request that needs Mongo runs it instead, so requests that don't (the health
+# check, the resume) are served without waiting on the database
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
+database_ready: Optional[asyncio.Task] = None
+
+async def get_db():
+    """This worker's database, connecting on first use; concurrent callers share one attempt."""
+    global database_ready
+    task = database_ready
+    if task is not None and task.done() and not task.cancelled() and task.exception() is None:
+        return db
+    if task is None:
+        task = database_ready = asyncio.create_task(connect_database())
+    try:
+        await asyncio.shield(task)
+    except Exception:
+        # Let the next request try again
+        if database_ready is task and task.done():
+            database_ready = None
+        raise
+    return db
+
+# Dependency for routes that use Mongo or the state bound to it
+async def require_database():
+    try:
+        await get_db()
+    except Exception as e:
+        logger.error(f"Error connecting to MongoDB: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable", headers={"Retry-After": "5"})
+
+@asynccontextmanager
+async def lifespan(app):
+    if STARTUP_MODE != "lazy":
+        await get_db()
+
+    yield
+
+    if database_ready is None:
+        return
+    # Let a connection attempt still in progress finish, so its background tasks are stopped below
+    try:
+        await database_ready
+    except Exception:
+        pass
+    # The server has stopped accepting requests and waited for in-flight ones;
+    # finish any contact writes that are still outstanding before closing the client
+    if pending_inserts:
+        logger.info(f"Waiting for {len(pending_inserts)} contact message inserts")
+        await asyncio.wait(pending_inserts, timeout=float(os.environ.get("SHUTDOWN_DRAIN_SECONDS", "10")))
+    if contact_queue is not None:
+        await contact_queue.stop()
+    if contact_notifier is not None:
+        await contact_notifier.stop()
+    if live_feed is not None:
+        await live_feed.stop()
+    try:
+        if message_rollups is not None:
+            await message_rollups.stop()
+    except Exception as e:
+        logger.error(f"Error flushing contact message rollups: {str(e)}")
+    if client is not None:
+        client.close()
 
 # Create the main app without a prefix
-app = FastAPI(title="Smriti Jha Portfolio API", version="1.0.0")
+app = FastAPI(title="Smriti Jha Portfolio API", version="1.0.0", default_response_class=FastJSONResponse, lifespan=lifespan)
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# Create a router with the /api prefix; its routes mark request phases for the slow request log
+api_router = APIRouter(prefix="/api", route_class=TimedRoute)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Configure logging: records are queued and formatted/written by a listener thread, so a
+# slow sink never blocks the event loop. LOG_FORMAT is "json" (default) or "text";
+# LOG_SAMPLE_RATES keeps a fraction of info records per route, e.g. "/api/contact=0.1".
+log_listener = configure_logging(
+    level=getattr(logging, os.environ.get("LOG_LEVEL", "INFO").upper()),
+    fmt=os.environ.get("LOG_FORMAT", "json"),
+    sample_rates=parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", "")),
+    queue_size=int(os.environ.get("LOG_QUEUE_SIZE", "10000")),
 )
 logger = logging.getLogger(__name__)
 
@@ -36,73 +348,212 @@ logger = logging.getLogger(__name__)
 async def root():
     return {"message": "Smriti Jha Portfolio API is running!", "status": "healthy"}
 
+# Readiness check: Mongo reachability, round-trip latency and pool state
+@api_router.get("/ready", dependencies=[Depends(require_database)])
+async def readiness():
+    from database import pool_state
+
+    probe = await readiness_probe.check()
+    content = {"status": "ready" if probe["ready"] else "unavailable", "mongo": probe, "pool": pool_state()}
+    return FastJSONResponse(content, status_code=200 if probe["ready"] else 503)
+
 # Contact form endpoint
-@api_router.post("/contact", response_model=ContactMessageResponse)
+@api_router.post("/contact", response_model=ContactMessageResponse, dependencies=[Depends(require_database)])
 async def submit_contact_form(contact_data: ContactMessageCreate, request: Request):
+    from ingest import QueueFullError
+    from rate_limit import RateLimitExceeded
+
     try:
-        # Create contact message document
-        contact_message = ContactMessage(
-            name=contact_data.name,
-            email=contact_data.email,
-            subject=contact_data.subject,
-            message=contact_data.message,
-            ip_address=request.client.host if request.client else None,
-            user_agent=request.headers.get("user-agent", "")
-        )
-        
-        # Convert to dict for MongoDB insertion
-        message_dict = contact_message.model_dump()
+        with span("rate_limit"):
+            await contact_rate_limiter.check(
+                ip=request.client.host if request.client else None,
+                email=contact_data.email.lower(),
+            )
+
+        with span("spam_check"):
+            duplicate = duplicate_detector.check(contact_data.subject, contact_data.message)
+        if duplicate is not None:
+            logger.info(f"Contact message from {contact_data.email} flagged as {duplicate}")
+            if SPAM_ACTION == "reject":
+                raise HTTPException(status_code=409, detail="This message has already been received")
+
+        try:
+            # Create contact message document
+            with span("build_message"):
+                contact_message = ContactMessage(
+                    name=contact_data.name,
+                    email=contact_data.email,
+                    subject=contact_data.subject,
+                    message=contact_data.message,
+                    status="spam" if duplicate is not None else "new",
+                    ip_address=request.client.host if request.client else None,
+                    user_agent=request.headers.get("user-agent", "")
+                )
+
+            if contact_queue is not None:
+                # Write-behind: acknowledge once queued, the batch flusher does the insert
+                await contact_queue.submit(contact_message)
+                logger.info(f"Contact message queued from {contact_data.email} - Subject: {contact_data.subject}")
+
+                return ContactMessageResponse(
+                    success=True,
+                    message="Thank you for your message! I'll get back to you soon.",
+                    id=contact_message.id
+                )
+
+            # Convert to dict for MongoDB insertion
+            message_dict = contact_message.model_dump()
         
-        # Insert into database
-        result = await db.contact_messages.insert_one(message_dict)
+            # Insert into database; shielded so a client disconnect or shutdown doesn't abandon the write
+            insert = asyncio.create_task(db.contact_messages.insert_one(message_dict))
+            pending_inserts.add(insert)
+            insert.add_done_callback(pending_inserts.discard)
+            with span("insert"):
+                result = await asyncio.shield(insert)
         
-        if result.inserted_id:
-            logger.info(f"Contact message received from {contact_data.email} - Subject: {contact_data.subject}")
+            if result.inserted_id:
+                with span("stored_hooks"):
+                    messages_stored([message_dict])
+                logger.info(f"Contact message received from {contact_data.email} - Subject: {contact_data.subject}")
             
-            return ContactMessageResponse(
-                success=True,
-                message="Thank you for your message! I'll get back to you soon.",
-                id=contact_message.id
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save message")
+                return ContactMessageResponse(
+                    success=True,
+                    message="Thank you for your message! I'll get back to you soon.",
+                    id=contact_message.id
+                )
+            else:
+                raise HTTPException(status_code=500, detail="Failed to save message")
             
+        except Exception:
+            # Not stored, so a retry of the same message must not be flagged as a duplicate
+            if duplicate is None:
+                duplicate_detector.forget(contact_data.subject, contact_data.message)
+            raise
+            
+    except RateLimitExceeded as e:
+        logger.info(f"Rate limited contact submission by {e.rule}")
+        raise HTTPException(status_code=429, detail="Too many messages, please try again later", headers={"Retry-After": str(e.retry_after)})
+    except QueueFullError:
+        logger.error("Contact message queue is full, rejecting submission")
+        raise HTTPException(status_code=503, detail="Too many submissions, please retry shortly", headers={"Retry-After": "1"})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing contact form: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-# Get all contact messages (for admin use)
-@api_router.get("/contact/messages")
-async def get_contact_messages(limit: int = 50):
+# Get contact messages, newest first, one keyset page at a time (for admin use)
+@api_router.get("/contact/messages", dependencies=[Depends(require_database)])
+async def get_contact_messages(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_spam: bool = False,
+):
+    from filters import NOT_SPAM
+    from pagination import MESSAGE_SORT, InvalidCursorError, keyset_filter, next_cursor
+
     try:
-        messages = await db.contact_messages.find().sort("timestamp", -1).limit(limit).to_list(length=limit)
-        
-        # Convert ObjectId to string for JSON serialization
-        for message in messages:
-            message["_id"] = str(message["_id"])
-            
-        return {"messages": messages, "count": len(messages)}
+        query = keyset_filter(cursor, None if include_spam else NOT_SPAM)
+
+        # Fetch one extra document to learn whether another page exists; `id` is the
+        # public identifier, so the ObjectId is projected out rather than converted
+        with span("find"):
+            messages = await db.contact_messages.find(query, {"_id": 0}).sort(MESSAGE_SORT).limit(limit + 1).to_list(length=limit + 1)
+        cursor_out = next_cursor(messages, limit)
+        messages = messages[:limit]
+
+        # Returned directly so the documents go straight to the encoder
+        with span("encode"):
+            return FastJSONResponse({"messages": messages, "count": len(messages), "next_cursor": cursor_out})
         
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error fetching contact messages: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch messages")
 
+# Stream contact messages as NDJSON or CSV (for admin use)
+@api_router.get("/contact/messages/export", dependencies=[Depends(require_database)])
+async def export_contact_messages(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    from export import export_messages
+    from filters import message_filter
+
+    query = message_filter(status=status, since=since, until=until)
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+
+    async def body():
+        try:
+            async for chunk in export_messages(db.contact_messages, query, format):
+                yield chunk
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated body
+            logger.error(f"Error exporting contact messages: {str(e)}")
+            raise
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=contact_messages_{timestamp}.{format}"},
+    )
+
+# Search contact messages by sender, subject and body text (for admin use)
+@api_router.get("/contact/messages/search", dependencies=[Depends(require_database)])
+async def search_contact_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+):
+    from filters import message_filter
+    from search import search_memory, search_mongo
+
+    try:
+        skip = (page - 1) * limit
+        if search_index is not None:
+            filters = {"status": status, "since": since, "until": until}
+            result = await search_memory(search_index, db.contact_messages, q, filters, skip, limit)
+        else:
+            match = message_filter(status=status, since=since, until=until)
+            result = await search_mongo(db.contact_messages, q, match, skip, limit)
+
+        return FastJSONResponse({**result, "page": page, "limit": limit})
+
+    except Exception as e:
+        logger.error(f"Error searching contact messages: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to search messages")
+
+# Live feed of new messages and status changes as server-sent events (for admin use).
+# Reconnecting clients send Last-Event-ID (or ?last_event_id=) to receive what they missed.
+@api_router.get("/contact/messages/live", dependencies=[Depends(require_database)])
+async def live_contact_messages(request: Request, include_spam: bool = False, last_event_id: Optional[str] = None):
+    events = live_feed.stream(
+        last_event_id=request.headers.get("last-event-id") or last_event_id,
+        include_spam=include_spam,
+        heartbeat=LIVE_FEED_HEARTBEAT_SECONDS,
+        max_duration=LIVE_FEED_MAX_SECONDS or None,
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers={"X-Accel-Buffering": "no"})
+
 # Resume download endpoint
 @api_router.get("/resume/download")
-async def download_resume():
+async def download_resume(request: Request):
     try:
-        # For now, we'll return a JSON response indicating the resume would be downloaded
-        # In a real implementation, you would serve the actual PDF file
-        resume_path = ROOT_DIR / "static" / "RESUME_SDE.pdf"
+        resume = await static_assets.get("RESUME_SDE.pdf")
         
-        if resume_path.exists():
-            return FileResponse(
-                path=resume_path,
-                filename="RESUME_SDE.pdf",
-                media_type="application/pdf"
-            )
+        if resume is not None:
+            return asset_response(resume, request, filename="RESUME_SDE.pdf")
         else:
             # Mock response for now - you'll need to add the actual resume file
+            from fastapi.responses import JSONResponse
+
             return JSONResponse(
                 content={
                     "message": "Resume download initiated",
@@ -118,27 +569,128 @@ async def download_resume():
         logger.error(f"Error serving resume: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to serve resume")
 
-# Portfolio data endpoint (future enhancement)
-@api_router.get("/portfolio")
+# Portfolio data endpoint
+@api_router.get("/portfolio", dependencies=[Depends(require_database)])
 async def get_portfolio_data():
-    return {
-        "message": "Portfolio data endpoint",
-        "note": "Currently using frontend mock data. This endpoint can be enhanced to serve dynamic data from database."
-    }
+    try:
+        await portfolio_store.revalidate()
+    except Exception as e:
+        # Keep serving the cached copy if Mongo is briefly unavailable
+        logger.error(f"Error revalidating portfolio data: {str(e)}")
+
+    if portfolio_store.body is None:
+        return {
+            "message": "Portfolio data endpoint",
+            "note": "No portfolio document stored yet. Seed one with `python portfolio.py seed <file.json>`."
+        }
+
+    # Conditional requests are answered by HTTPCacheMiddleware
+    return Response(content=portfolio_store.body, media_type="application/json", headers={"ETag": portfolio_store.etag})
+
+# Replace the portfolio data (for admin use)
+@api_router.put("/portfolio", dependencies=[Depends(require_database)])
+async def update_portfolio_data(data: PortfolioData):
+    try:
+        version = await portfolio_store.update(data)
+        logger.info(f"Portfolio data updated to version {version}")
+        return {"success": True, "version": version}
+    except Exception as e:
+        logger.error(f"Error updating portfolio data: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update portfolio data")
+
+async def query_portfolio_items(name: str, index, **filters):
+    try:
+        await portfolio_store.revalidate()
+    except Exception as e:
+        logger.error(f"Error revalidating portfolio data: {str(e)}")
+    try:
+        items = index.query(**filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({name: items, "count": len(items)})
+
+# Projects filtered by technology (all of them), category and keyword, optionally sorted
+# by duration in months or by the number in a metric, e.g. sort=metric:accuracy
+@api_router.get("/portfolio/projects", dependencies=[Depends(require_database)])
+async def get_portfolio_projects(
+    technology: Optional[List[str]] = Query(None),
+    category: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    sort: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+):
+    return await query_portfolio_items(
+        "projects", portfolio_store.projects,
+        technologies=technology, category=category, keyword=q, sort=sort, descending=order == "desc",
+    )
+
+# Experience filtered by technology and keyword, optionally sorted by duration
+@api_router.get("/portfolio/experience", dependencies=[Depends(require_database)])
+async def get_portfolio_experience(
+    technology: Optional[List[str]] = Query(None),
+    q: Optional[str] = Query(None, max_length=200),
+    sort: Optional[str] = Query(None, pattern="^duration$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+):
+    return await query_portfolio_items(
+        "experience", portfolio_store.experience,
+        technologies=technology, keyword=q, sort=sort, descending=order == "desc",
+    )
+
+# Contact message counts per day, status and user agent family (for admin use).
+# Served from the daily rollups, so the cost grows with the number of days, not messages.
+@api_router.get("/analytics/messages", dependencies=[Depends(require_database)])
+async def get_message_analytics(since: Optional[date] = None, until: Optional[date] = None):
+    try:
+        until = until or datetime.utcnow().date()
+        since = since or until - timedelta(days=29)
+        if since > until:
+            raise HTTPException(status_code=400, detail="since must not be after until")
+        if (until - since).days >= 366:
+            raise HTTPException(status_code=400, detail="Date range is limited to 366 days")
+        return FastJSONResponse(await message_rollups.query(since, until))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving message analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
+
+# Breakdown of recent slow requests by phase (for admin use)
+@api_router.get("/admin/slow-requests")
+async def get_slow_requests(limit: int = Query(50, ge=1, le=1000)):
+    return FastJSONResponse({
+        "threshold_ms": slow_request_log.threshold * 1000,
+        "requests": slow_request_log.recent(limit),
+    })
+
+# Sample stacks for a few seconds and return them as collapsed stacks for flamegraph
+# tools (for admin use). Samples the event loop thread unless all_threads is set.
+@api_router.post("/admin/profile")
+async def run_profiler(
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    all_threads: bool = False,
+):
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    stacks = await profiler.profile(seconds, interval_ms / 1000, None if all_threads else [threading.get_ident()])
+    return PlainTextResponse(stacks)
 
 # Update contact message status (for admin use)
-@api_router.patch("/contact/messages/{message_id}/status")
+@api_router.patch("/contact/messages/{message_id}/status", dependencies=[Depends(require_database)])
 async def update_message_status(message_id: str, status: str):
     try:
-        if status not in ["new", "read", "responded"]:
+        if status not in MESSAGE_STATUSES:
             raise HTTPException(status_code=400, detail="Invalid status")
             
-        result = await db.contact_messages.update_one(
-            {"id": message_id},
-            {"$set": {"status": status}}
+        previous = await db.contact_messages.find_one_and_update(
+            {"id": message_id, "status": {"$ne": status}},
+            {"$set": {"status": status}},
+            projection={"_id": 0, "id": 1, "status": 1, "timestamp": 1}
         )
         
-        if result.modified_count > 0:
+        if previous is not None:
+            message_statuses_changed([previous], status)
             return {"success": True, "message": f"Status updated to {status}"}
         else:
             raise HTTPException(status_code=404, detail="Message not found")
@@ -149,6 +701,73 @@ async def update_message_status(message_id: str, status: str):
         logger.error(f"Error updating message status: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update status")
 
+# Query plans for the built-in contact_messages queries (for admin use)
+@api_router.get("/admin/query-plans", dependencies=[Depends(require_database)])
+async def get_query_plans():
+    from indexes import explain_builtin_queries
+
+    try:
+        return {"plans": await explain_builtin_queries(db)}
+    except Exception as e:
+        logger.error(f"Error explaining queries: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to explain queries")
+
+# Update the status of many contact messages at once (for admin use)
+@api_router.patch("/contact/messages/status", response_model=BulkStatusUpdateResponse, dependencies=[Depends(require_database)])
+async def bulk_update_message_status(update: BulkStatusUpdate):
+    from analytics import count_by_day_and_status
+    from filters import message_filter
+
+    try:
+        if update.filter is not None:
+            query = message_filter(**update.filter.model_dump())
+            # Counted before the update, for the rollups' per-status counters
+            changing = await count_by_day_and_status(db.contact_messages, {**query, "status": query.get("status", {"$ne": update.status})})
+            result = await db.contact_messages.update_many(
+                query,
+                {"$set": {"status": update.status}}
+            )
+            message_rollups.record_counts(changing, update.status)
+            if search_index is not None:
+                search_index.set_status_where(update.status, current=update.filter.status, since=update.filter.since, until=update.filter.until)
+            # Affected ids aren't known here; live clients reload the listing
+            live_feed.publish_local("status_filter", {"status": update.status, "filter": update.filter.model_dump(), "modified_count": result.modified_count})
+            return BulkStatusUpdateResponse(
+                success=True,
+                matched_count=result.matched_count,
+                modified_count=result.modified_count
+            )
+
+        ids = list(dict.fromkeys(update.ids))
+        current = {
+            message["id"]: message
+            async for message in db.contact_messages.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "status": 1, "timestamp": 1})
+        }
+        result = await db.contact_messages.update_many(
+            {"id": {"$in": ids}, "status": {"$ne": update.status}},
+            {"$set": {"status": update.status}}
+        )
+
+        results = {}
+        for message_id in ids:
+            if message_id not in current:
+                results[message_id] = "not_found"
+            elif current[message_id]["status"] == update.status:
+                results[message_id] = "unchanged"
+            else:
+                results[message_id] = "updated"
+        message_statuses_changed([current[message_id] for message_id, outcome in results.items() if outcome == "updated"], update.status)
+        return BulkStatusUpdateResponse(
+            success=True,
+            matched_count=len(current),
+            modified_count=result.modified_count,
+            results=results
+        )
+
+    except Exception as e:
+        logger.error(f"Error bulk updating message status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update status")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -160,10 +779,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+# Cache-Control for GET routes that may be cached; everything else, including the
+# admin routes over contact messages, is sent with no-store
+PORTFOLIO_CACHE_POLICY = f"public, max-age={os.environ.get('PORTFOLIO_CACHE_MAX_AGE', '3600')}, stale-while-revalidate=86400"
+CACHE_POLICIES = {
+    "/api/": "public, max-age=300",
+    "/api/portfolio": PORTFOLIO_CACHE_POLICY,
+    "/api/portfolio/projects": PORTFOLIO_CACHE_POLICY,
+    "/api/portfolio/experience": PORTFOLIO_CACHE_POLICY,
+}
+
+app.add_middleware(
+    HTTPCacheMiddleware,
+    policies=CACHE_POLICIES,
+    minimum_size=int(os.environ.get("COMPRESSION_MIN_SIZE", "1024")),
+)
+
+# Inside MetricsMiddleware, whose per-request Mongo time it reports
+app.add_middleware(SlowRequestMiddleware, log=slow_request_log)
+
+app.add_middleware(MetricsMiddleware)
+
+# Outermost, so every log record written while serving a request carries its id
+app.add_middleware(RequestContextMiddleware)
+
+@app.exception_handler(HTTPException)
+async def count_server_errors(request: Request, exc: HTTPException):
+    if exc.status_code >= 500:
+        http_server_errors_total.inc(route_label(request.scope), str(exc.detail))
+    return await http_exception_handler(request, exc)
+
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # Several workers need the app as an import string; see DEPLOYMENT.md for what is per worker
+    uvicorn.run(
+        "server:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8001")),
+        workers=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        timeout_graceful_shutdown=int(os.environ.get("GRACEFUL_SHUTDOWN_SECONDS", "20")),
+    )
\ No newline at end of file
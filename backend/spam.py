@@ -0,0 +1,137 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# SimHash signatures are split into bands; two signatures within MAX_DISTANCE bits
+# of each other must agree exactly on at least one band (pigeonhole), so each
+# band is a hash-table lookup rather than a scan over every stored signature.
+SIGNATURE_BITS = 64
+BANDS = 4
+BAND_BITS = SIGNATURE_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+MASK = (1 << SIGNATURE_BITS) - 1
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def simhash(words: List[str]) -> int:
+    """64-bit SimHash over the set of word bigrams, with every feature weighted equally.
+
+    Instead of keeping 64 separate counters, the per-bit counts are kept as a
+    bit-sliced binary number (one int per bit of the count), so adding a
+    feature costs O(log n) int operations rather than 64 additions. Features
+    are hashed with the built-in string hash: signatures only need to be
+    stable for the lifetime of the in-memory index that holds them.
+    """
+    features = {f"{a} {b}" for a, b in zip(words, words[1:])} or set(words)
+    planes: List[int] = []
+    for feature in features:
+        carry = hash(feature) & MASK
+        for index, plane in enumerate(planes):
+            planes[index], carry = plane ^ carry, plane & carry
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+
+    # Set each bit whose count is more than half the features, comparing from the top plane down
+    threshold = len(features) // 2
+    greater, equal = 0, MASK
+    for index in range(max(len(planes), threshold.bit_length()) - 1, -1, -1):
+        plane = planes[index] if index < len(planes) else 0
+        if (threshold >> index) & 1:
+            equal &= plane
+        else:
+            greater |= equal & plane
+            equal &= ~plane & MASK
+    return greater
+
+
+def _bands(signature: int) -> List[int]:
+    return [(signature >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+class DuplicateDetector:
+    """Bounded in-memory index of recent message bodies.
+
+    Exact duplicates are found by a hash of the normalized text, near
+    duplicates by SimHash signatures within `max_distance` bits. At most
+    `capacity` messages are remembered; the oldest are forgotten first.
+    """
+
+    def __init__(self, capacity: int = 50000, max_distance: int = 3, min_chars: int = 20, min_words: int = 8):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookups to be exact")
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.min_chars = min_chars
+        self.min_words = min_words
+        self._exact: "OrderedDict[bytes, None]" = OrderedDict()
+        self._signatures: "OrderedDict[int, None]" = OrderedDict()
+        self._bands: List[Dict[int, Set[int]]] = [{} for _ in range(BANDS)]
+
+    def _fingerprint(self, subject: str, message: str) -> Optional[Tuple[bytes, Optional[int]]]:
+        text = _normalize(f"{subject}\n{message}")
+        if len(text) < self.min_chars:
+            return None
+        words = _WORD_RE.findall(text)
+        return hashlib.sha256(text.encode()).digest(), simhash(words) if len(words) >= self.min_words else None
+
+    def check(self, subject: str, message: str) -> Optional[str]:
+        """Return "duplicate" or "near_duplicate" for a repeated body, otherwise remember it and return None."""
+        fingerprint = self._fingerprint(subject, message)
+        if fingerprint is None:
+            return None
+
+        digest, signature = fingerprint
+        if digest in self._exact:
+            self._exact.move_to_end(digest)
+            return "duplicate"
+        if signature is not None and self._near(signature):
+            return "near_duplicate"
+
+        self._remember(digest, signature)
+        return None
+
+    def forget(self, subject: str, message: str):
+        """Undo a check() that remembered this message, e.g. because it could not be stored."""
+        fingerprint = self._fingerprint(subject, message)
+        if fingerprint is None:
+            return
+        digest, signature = fingerprint
+        self._exact.pop(digest, None)
+        if signature is not None and signature in self._signatures:
+            del self._signatures[signature]
+            self._drop_bands(signature)
+
+    def _near(self, signature: int) -> bool:
+        for band, value in enumerate(_bands(signature)):
+            for candidate in self._bands[band].get(value, ()):
+                if bin(candidate ^ signature).count("1") <= self.max_distance:
+                    return True
+        return False
+
+    def _remember(self, digest: bytes, signature: Optional[int]):
+        self._exact[digest] = None
+        if signature is not None:
+            self._signatures[signature] = None
+            for band, value in enumerate(_bands(signature)):
+                self._bands[band].setdefault(value, set()).add(signature)
+        if len(self._exact) > self.capacity:
+            self._exact.popitem(last=False)
+        if len(self._signatures) > self.capacity:
+            oldest, _ = self._signatures.popitem(last=False)
+            self._drop_bands(oldest)
+
+    def _drop_bands(self, signature: int):
+        for band, value in enumerate(_bands(signature)):
+            bucket = self._bands[band].get(value)
+            if bucket is not None:
+                bucket.discard(signature)
+                if not bucket:
+                    del self._bands[band][value]
@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip variants are always available
+    brotli = None
+
+# Only keep a compressed variant when it saves at least this fraction of the bytes
+MIN_COMPRESSION_SAVING = 0.1
+
+
+class StaticAsset:
+    """A static file held in memory together with its validators and compressed variants."""
+
+    def __init__(self, path: Path, body: bytes, mtime: float):
+        self.path = path
+        self.body = body
+        self.mtime = mtime
+        self.size = len(body)
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.last_modified = formatdate(int(mtime), usegmt=True)
+        self.variants: Dict[str, bytes] = {}
+        self._compress()
+
+    def _compress(self):
+        candidates = {"gzip": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            candidates["br"] = lambda data: brotli.compress(data, quality=11)
+        for encoding, compress in candidates.items():
+            compressed = compress(self.body)
+            if len(compressed) <= self.size * (1 - MIN_COMPRESSION_SAVING):
+                self.variants[encoding] = compressed
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        # Strong validators must differ between representations
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+class StaticAssetCache:
+    """Loads files from a directory once and serves them from memory.
+
+    Each entry re-checks the file's mtime at most once per `revalidate_interval`
+    seconds, so steady-state hits do no disk I/O at all.
+    """
+
+    def __init__(self, directory: Path, revalidate_interval: float = 2.0):
+        self.directory = Path(directory)
+        self.revalidate_interval = revalidate_interval
+        self._entries: Dict[str, Tuple[Optional[StaticAsset], float]] = {}
+
+    async def get(self, name: str) -> Optional[StaticAsset]:
+        now = time.monotonic()
+        asset, checked_at = self._entries.get(name, (None, float("-inf")))
+        if now - checked_at < self.revalidate_interval:
+            return asset
+
+        # Reading and compressing (brotli at quality 11 in particular) would block the event loop
+        asset = await asyncio.to_thread(self._load, self.directory / name, asset)
+        self._entries[name] = (asset, now)
+        return asset
+
+    @staticmethod
+    def _load(path: Path, asset: Optional[StaticAsset]) -> Optional[StaticAsset]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        if asset is None or asset.mtime != stat.st_mtime or asset.size != stat.st_size:
+            asset = StaticAsset(path, path.read_bytes(), stat.st_mtime)
+        return asset
+
+
+def accepted_encodings(header: str) -> List[str]:
+    # Encodings the client accepts, best first; q=0 means "not acceptable"
+    accepted = []
+    for item in header.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if parts[0] and quality > 0:
+            accepted.append((quality, parts[0].lower()))
+    return [encoding for _, encoding in sorted(accepted, key=lambda item: -item[0])]
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive offsets.
+
+    Returns None for headers that should be ignored (other units, multiple
+    ranges, invalid syntax) and raises ValueError for well-formed ranges that
+    cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start, dash, end = spec.strip().partition("-")
+    start, end = start.strip(), end.strip()
+    if not dash or not (start or end) or not all(part.isdigit() for part in (start, end) if part):
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length <= 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    first = int(start)
+    if end and int(end) < first:
+        return None
+    if first >= size:
+        raise ValueError(header)
+    last = min(int(end), size - 1) if end else size - 1
+    return first, last
+
+
+def _not_modified(asset: StaticAsset, request: Request, etags: List[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or any(tag in candidates for tag in etags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(asset.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def asset_response(asset: StaticAsset, request: Request, filename: Optional[str] = None) -> Response:
+    """Build a response for `asset` honouring conditional, range and encoding headers."""
+    headers = {
+        "Last-Modified": asset.last_modified,
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=0, must-revalidate",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    all_etags = [asset.variant_etag(None)] + [asset.variant_etag(encoding) for encoding in asset.variants]
+    if _not_modified(asset, request, all_etags):
+        encoding = next((e for e in accepted_encodings(request.headers.get("accept-encoding", "")) if e in asset.variants), None)
+        headers["ETag"] = asset.variant_etag(encoding)
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range in (asset.etag, asset.last_modified)):
+        try:
+            byte_range = _parse_range(range_header, asset.size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{asset.size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            first, last = byte_range
+            headers["ETag"] = asset.etag
+            headers["Content-Range"] = f"bytes {first}-{last}/{asset.size}"
+            return Response(
+                content=asset.body[first:last + 1],
+                status_code=206,
+                headers=headers,
+                media_type=asset.media_type,
+            )
+
+    # Ranges always address the identity encoding, so compression only applies to full bodies
+    for encoding in accepted_encodings(request.headers.get("accept-encoding", "")):
+        if encoding in asset.variants:
+            headers["ETag"] = asset.variant_etag(encoding)
+            headers["Content-Encoding"] = encoding
+            return Response(content=asset.variants[encoding], headers=headers, media_type=asset.media_type)
+
+    headers["ETag"] = asset.etag
+    return Response(content=asset.body, headers=headers, media_type=asset.media_type)
@@ -0,0 +1,145 @@
+import atexit
+import logging
+import queue
+import sys
+import traceback
+import uuid
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import log_records_dropped_total, route_label
+from serialization import dumps
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Loggers that uvicorn configures with its own (synchronous) handlers
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# The current request's id and ASGI scope; the route is read from the scope when
+# a record is logged, since routing happens after the id is assigned
+request_context: ContextVar[Optional[dict]] = ContextVar("request_context", default=None)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "/api/contact=0.1,/api/=0" into {route: fraction of info records kept}."""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if item:
+            route, _, rate = item.rpartition("=")
+            rates[route.strip()] = float(rate)
+    return rates
+
+
+class ContextQueueHandler(QueueHandler):
+    """Puts records on a queue for a listener thread without formatting them first.
+
+    The stock QueueHandler formats each record on the calling thread; here the
+    event loop only attaches the request id and route. Messages, arguments and
+    tracebacks are rendered by the listener's handlers. When the queue is full
+    the record is dropped and counted rather than blocking the caller.
+
+    Info and debug records from routes listed in `sample_rates` are kept for
+    that fraction of requests, chosen by request id so a sampled request keeps
+    all of its records. Warnings and errors are always kept.
+    """
+
+    def __init__(self, log_queue: queue.Queue, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__(log_queue)
+        self.sample_rates = sample_rates or {}
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.inc()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = request_context.get()
+        record.request_id = context["id"] if context else None
+        record.route = route_label(context["scope"]) if context else None
+        if record.levelno < logging.WARNING and context and self.sample_rates:
+            rate = self.sample_rates.get(record.route)
+            if rate is not None and zlib.crc32(record.request_id.encode()) / 0xFFFFFFFF >= rate:
+                return False
+        return super().filter(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id, route and traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+            entry["route"] = record.route
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return dumps(entry).decode()
+
+
+def configure_logging(level: int = logging.INFO, fmt: str = "json", sample_rates: Optional[Dict[str, float]] = None, queue_size: int = 10000) -> QueueListener:
+    """Route the root and uvicorn loggers through a queue to a stderr handler on a listener thread."""
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = ContextQueueHandler(log_queue, sample_rates)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    for name in UVICORN_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers = [handler] if name != "uvicorn.error" else []
+        logger.propagate = name == "uvicorn.error"
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+
+class RequestContextMiddleware:
+    """Assigns each request an id (from X-Request-ID, or a new one) for log records and the response."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        token = request_context.set({"id": request_id, "scope": scope})
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_context.reset(token)
@@ -14,10 +14,18 @@ const Portfolio = () => {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    // Simulate API call with mock data
+    // Load portfolio data from the backend, falling back to the bundled mock data
     const loadData = async () => {
-      await new Promise(resolve => setTimeout(resolve, 500)); // Simulate loading
-      setData(mockPortfolioData);
+      try {
+        const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+        const response = await fetch(`${BACKEND_URL}/api/portfolio`);
+        const result = response.ok ? await response.json() : null;
+        // The endpoint returns a placeholder until a portfolio document is stored
+        setData(result && result.personal ? result : mockPortfolioData);
+      } catch (error) {
+        console.error('Portfolio data error:', error);
+        setData(mockPortfolioData);
+      }
       setLoading(false);
     };
     loadData();
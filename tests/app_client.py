@@ -0,0 +1,23 @@
+"""Run the backend in-process against tests/fake_motor.py for behavior tests."""
+
+from contextlib import asynccontextmanager
+
+import httpx
+
+from tests.bench.benchmark import load_app, seed
+from tests.fake_motor import FakeMotorClient
+
+
+@asynccontextmanager
+async def app_client(messages: int = 0):
+    """Yield (server module, httpx client) with a fresh fake database and `messages` seeded messages."""
+    server = load_app()
+    FakeMotorClient.reset()
+    await seed(server, messages)
+    # Each test gets its own worker state (client, search index, spam fingerprints...),
+    # as a freshly started worker would
+    server.client = server.database_ready = None
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield server, client
@@ -0,0 +1,355 @@
+"""Throughput and latency benchmarks for every route on the API router.
+
+The FastAPI app runs in-process against the in-memory Motor stand-in in
+tests/fake_motor.py, so results are reproducible without a database.
+
+    python -m tests.bench.benchmark                   # run and print results
+    python -m tests.bench.benchmark --save-baseline   # record tests/bench/baseline.json
+    python -m tests.bench.benchmark --check           # fail if a route regressed
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from tests.fake_motor import FakeMotorClient
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_DIR = REPO_ROOT / "backend"
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+DEFAULT_LEVELS = (1, 8, 32)
+DEFAULT_REQUESTS = 200
+SEED_MESSAGES = 500
+
+# A route regresses when its p95 grows by more than this factor and by more than MIN_DELTA_MS
+DEFAULT_THRESHOLD = 1.5
+MIN_DELTA_MS = 1.0
+
+# Environment for the app under test: no rate limits, so repeated posts from one client succeed
+BENCH_ENV = {
+    "MONGO_URL": "mongodb://bench.invalid:27017",
+    "DB_NAME": "bench",
+    "RATE_LIMIT_PER_IP": "",
+    "RATE_LIMIT_PER_EMAIL": "",
+    # The stand-in has no text indexes
+    "SEARCH_BACKEND": "memory",
+    # ...nor change streams; live feed streams are cut short so each request completes
+    "LIVE_FEED_SOURCE": "memory",
+    "LIVE_FEED_MAX_SECONDS": "0.02",
+}
+
+
+def load_app():
+    """Import the backend with Motor replaced by the in-memory stand-in."""
+    if "server" in sys.modules:
+        return sys.modules["server"]
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    import motor.motor_asyncio
+
+    motor.motor_asyncio.AsyncIOMotorClient = FakeMotorClient
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+
+    return server
+
+
+@dataclass
+class BenchContext:
+    message_ids: List[str]
+    counter: itertools.count = field(default_factory=itertools.count)
+
+
+@dataclass
+class RouteSpec:
+    method: str
+    path: str
+    # Builds the keyword arguments for one httpx request
+    build: Callable[[BenchContext], dict]
+    ok_statuses: tuple = (200,)
+    # Fraction of the configured request count to run, for routes that are slow by design
+    scale: float = 1.0
+
+
+STATUSES = ("read", "responded", "new")
+
+
+def _next_status(ctx: BenchContext):
+    # Walk the seeded ids so that every update actually changes a status
+    k = next(ctx.counter)
+    return ctx.message_ids[k % len(ctx.message_ids)], STATUSES[(k // len(ctx.message_ids)) % len(STATUSES)]
+
+
+def _contact_body(ctx: BenchContext) -> dict:
+    k = next(ctx.counter)
+    return {"json": {
+        "name": "Bench User",
+        "email": f"bench{k}@example.com",
+        "subject": f"Benchmark message {k}",
+        "message": f"Load test message number {k} for the contact endpoint.",
+    }}
+
+
+def _status_update(ctx: BenchContext) -> dict:
+    message_id, status = _next_status(ctx)
+    return {"url": f"/api/contact/messages/{message_id}/status", "params": {"status": status}}
+
+
+def _bulk_status_update(ctx: BenchContext) -> dict:
+    k = next(ctx.counter)
+    start = (k * 50) % len(ctx.message_ids)
+    return {"json": {"status": STATUSES[k % len(STATUSES)], "ids": ctx.message_ids[start:start + 50]}}
+
+
+PORTFOLIO = {
+    "personal": {
+        "name": "Bench Person", "title": "Engineer", "tagline": "Benchmarks things", "email": "bench@example.com",
+        "phone": "000", "location": "Nowhere", "linkedin": "https://linkedin.com/in/bench",
+        "github": "https://github.com/bench", "website": "https://bench.example.com",
+    },
+    "about": {"summary": "Synthetic portfolio used by the benchmarks.", "highlights": ["Fast", "Reproducible"]},
+    "skills": {
+        "programming": ["Python", "JavaScript"], "frontend": ["React"], "backend": ["FastAPI"],
+        "cloudDevOps": ["Docker"], "databases": ["MongoDB"], "dataScience": ["Pandas"], "tools": ["Git"],
+    },
+    "projects": [
+        {
+            "id": i, "title": f"Project {i}", "description": "A synthetic project.",
+            "technologies": ["Python", "React", "MongoDB"][: 1 + i % 3], "features": ["Feature"],
+            "metrics": {"speed": f"{10 * i}% faster"}, "githubUrl": f"https://github.com/bench/project-{i}",
+            "category": ["Full-Stack Development", "AI/ML"][i % 2], "duration": "Jan 2024 – Mar 2024",
+        }
+        for i in range(1, 9)
+    ],
+    "experience": [
+        {
+            "id": i, "company": f"Company {i}", "role": "Intern", "duration": "May 2024 – Jul 2024",
+            "location": "Remote", "description": "Synthetic experience.", "achievements": ["Shipped things"],
+            "technologies": ["Python", "Azure"],
+        }
+        for i in range(1, 4)
+    ],
+    "education": [{"degree": "B.Tech", "institution": "University", "year": "2026"}],
+    "certifications": ["Certificate"],
+    "achievements": ["Achievement"],
+}
+
+
+ROUTES: List[RouteSpec] = [
+    RouteSpec("GET", "/api/", lambda ctx: {}),
+    RouteSpec("GET", "/api/ready", lambda ctx: {}),
+    RouteSpec("POST", "/api/contact", _contact_body),
+    RouteSpec("GET", "/api/contact/messages", lambda ctx: {"params": {"limit": 50}}),
+    RouteSpec("GET", "/api/contact/messages/export", lambda ctx: {"params": {"format": "ndjson"}}, scale=0.1),
+    RouteSpec("GET", "/api/contact/messages/live", lambda ctx: {}, scale=0.1),
+    RouteSpec("GET", "/api/contact/messages/search", lambda ctx: {"params": {"q": "collaboration seeded", "limit": 20}}),
+    RouteSpec("GET", "/api/resume/download", lambda ctx: {}),
+    RouteSpec("GET", "/api/portfolio", lambda ctx: {}),
+    RouteSpec("PUT", "/api/portfolio", lambda ctx: {"json": PORTFOLIO}),
+    RouteSpec("GET", "/api/portfolio/projects", lambda ctx: {"params": {"technology": "Python", "q": "synthetic", "sort": "metric:speed"}}),
+    RouteSpec("GET", "/api/portfolio/experience", lambda ctx: {"params": {"technology": "Azure", "sort": "duration"}}),
+    RouteSpec("PATCH", "/api/contact/messages/{message_id}/status", _status_update),
+    RouteSpec("PATCH", "/api/contact/messages/status", _bulk_status_update),
+    RouteSpec("GET", "/api/admin/query-plans", lambda ctx: {}),
+    RouteSpec("GET", "/api/admin/slow-requests", lambda ctx: {}),
+    # Concurrent profiles are refused while one is running
+    RouteSpec("POST", "/api/admin/profile", lambda ctx: {"params": {"seconds": 0.02, "interval_ms": 2}}, ok_statuses=(200, 409), scale=0.1),
+    RouteSpec("GET", "/api/analytics/messages", lambda ctx: {"params": {"since": (datetime.utcnow() - timedelta(days=90)).date().isoformat()}}),
+]
+
+
+def api_routes(server) -> List[str]:
+    """Every method/path pair registered on the API router."""
+    return sorted(
+        f"{method} {route.path}"
+        for route in server.api_router.routes
+        for method in getattr(route, "methods", ())
+        if method != "HEAD"
+    )
+
+
+async def seed(server, messages: int = SEED_MESSAGES) -> BenchContext:
+    from models import ContactMessage
+
+    base = datetime.utcnow() - timedelta(days=30)
+    documents = [
+        ContactMessage(
+            name=f"Seed {i}",
+            email=f"seed{i}@example.com",
+            subject=f"Seeded subject {i}",
+            message=f"Seeded message body {i} about a potential collaboration.",
+            timestamp=base + timedelta(minutes=i),
+            user_agent="Mozilla/5.0 (bench)",
+        ).model_dump()
+        for i in range(messages)
+    ]
+    # The app only creates its client at startup, so seed through a client of our own
+    db = FakeMotorClient()[server.DB_NAME]
+    await db.contact_messages.insert_many(documents)
+    await db.portfolio.replace_one({"_id": "default"}, {"data": PORTFOLIO, "version": 1}, upsert=True)
+    return BenchContext(message_ids=[document["id"] for document in documents])
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _run_route(client: httpx.AsyncClient, spec: RouteSpec, ctx: BenchContext, concurrency: int, total: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = itertools.count()
+
+    async def worker():
+        while next(remaining) < total:
+            kwargs = spec.build(ctx)
+            url = kwargs.pop("url", spec.path)
+            start = time.perf_counter()
+            response = await client.request(spec.method, url, **kwargs)
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in spec.ok_statuses:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "errors": errors,
+    }
+
+
+async def run_benchmarks(levels=DEFAULT_LEVELS, requests: int = DEFAULT_REQUESTS, routes: Optional[List[RouteSpec]] = None) -> dict:
+    server = load_app()
+    routes = routes or ROUTES
+    results: Dict[str, Dict[str, dict]] = {}
+    # Seed before startup so indexes and caches built at startup see the data
+    FakeMotorClient.reset()
+    ctx = await seed(server)
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for spec in routes:
+                name = f"{spec.method} {spec.path}"
+                total = max(1, int(requests * spec.scale))
+                results[name] = {str(level): await _run_route(client, spec, ctx, level, total) for level in levels}
+    return {
+        "meta": {
+            "levels": list(levels),
+            "requests": requests,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.utcnow().isoformat(),
+        },
+        "routes": results,
+    }
+
+
+def find_regressions(
+    current: dict,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_ms: float = MIN_DELTA_MS,
+    percentile: str = "p95",
+) -> List[str]:
+    key = f"{percentile}_ms"
+    regressions = []
+    for route, levels in current["routes"].items():
+        for level, stats in levels.items():
+            before = baseline.get("routes", {}).get(route, {}).get(level)
+            if before is None:
+                continue
+            if stats[key] > before[key] * threshold and stats[key] - before[key] > min_delta_ms:
+                regressions.append(
+                    f"{route} @ concurrency {level}: {percentile} {before[key]:.2f}ms -> {stats[key]:.2f}ms"
+                )
+    return regressions
+
+
+def settings_mismatch(baseline: dict, levels, requests: int) -> Optional[str]:
+    """Why results at `levels`/`requests` can't be compared with `baseline`, or None if they can."""
+    meta = baseline.get("meta", {})
+    recorded = (tuple(meta.get("levels", ())), meta.get("requests"))
+    if recorded != (tuple(levels), requests):
+        return (
+            f"baseline was recorded at levels {','.join(map(str, recorded[0]))} with {recorded[1]} requests, "
+            f"not levels {','.join(map(str, levels))} with {requests}"
+        )
+    return None
+
+
+def _print_table(results: dict):
+    print(f"{'route':<52} {'conc':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} errors")
+    for route, levels in results["routes"].items():
+        for level, stats in levels.items():
+            print(
+                f"{route:<52} {level:>4} {stats['rps']:>9} {stats['p50_ms']:>9} "
+                f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['errors'] or ''}"
+            )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", help=f"Comma-separated concurrency levels (default {','.join(map(str, DEFAULT_LEVELS))}, or the baseline's with --check)")
+    parser.add_argument("--requests", type=int, help=f"Requests per route and concurrency level (default {DEFAULT_REQUESTS}, or the baseline's with --check)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this path")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the baseline")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if a route regressed against the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    levels = tuple(int(level) for level in args.levels.split(",")) if args.levels else None
+    requests = args.requests
+    baseline = None
+    if args.check:
+        if not args.baseline.exists():
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        baseline = json.loads(args.baseline.read_text())
+        # Compare like with like: run at the baseline's settings unless told otherwise
+        meta = baseline.get("meta", {})
+        levels = levels or tuple(meta.get("levels", DEFAULT_LEVELS))
+        requests = requests or meta.get("requests", DEFAULT_REQUESTS)
+        mismatch = settings_mismatch(baseline, levels, requests)
+        if mismatch:
+            print(f"Cannot check against {args.baseline}: {mismatch}")
+            return 1
+    levels = levels or DEFAULT_LEVELS
+    requests = requests or DEFAULT_REQUESTS
+    results = asyncio.run(run_benchmarks(levels, requests))
+    _print_table(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
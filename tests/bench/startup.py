@@ -0,0 +1,133 @@
+"""Cold start benchmark: how long a fresh worker takes to import the app and answer its first request.
+
+Runs the backend in a new interpreter under `python -X importtime`, with
+STARTUP_MODE=lazy, and times the import, lifespan startup and a first
+GET /api/ (which must not need Mongo). Import time is broken down by top-level
+package, and modules the app defers until they are needed must not be loaded.
+
+    python -m tests.bench.startup                      # print the breakdown
+    python -m tests.bench.startup --budget-ms 1500     # fail when over budget
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from tests.bench.benchmark import BACKEND_DIR, BENCH_ENV
+
+# Import, startup and first request together; generous so slow CI machines pass
+DEFAULT_BUDGET_MS = 2000.0
+
+# Modules only needed once a request reaches Mongo, or for optional features
+DEFERRED_MODULES = (
+    "motor", "smtplib",
+    "database", "indexes", "ingest", "portfolio", "portfolio_index", "pagination", "filters",
+    "search", "spam", "live_feed", "analytics", "export", "rate_limit", "notifications",
+)
+
+PROBE = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+import server
+imported = time.perf_counter()
+# Not part of a real worker, so loaded outside the timed sections
+import httpx
+
+async def first_request():
+    async with server.app.router.lifespan_context(server.app):
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/api/")
+        return started, time.perf_counter(), response.status_code
+
+lifespan_start = time.perf_counter()
+started, responded, status = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - lifespan_start) * 1000,
+    "first_request_ms": (responded - started) * 1000,
+    "status": status,
+    "deferred_loaded": sorted(name for name in %r if name in sys.modules),
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def parse_importtime(stderr: str, root: str = "server") -> List[Tuple[str, float]]:
+    """Self time in ms per top-level package, over everything `root` imported, largest first."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), depth, name.strip()))
+    # A module is reported after everything it imported, indented one level deeper
+    positions = [i for i, (_, depth, name) in enumerate(entries) if name == root and depth == 0]
+    if not positions:
+        return []
+    end = positions[0]
+    begin = end
+    while begin > 0 and entries[begin - 1][1] > 0:
+        begin -= 1
+    by_package: Dict[str, float] = defaultdict(float)
+    for self_us, _, name in entries[begin:end + 1]:
+        by_package[name.split(".")[0]] += self_us / 1000
+    return sorted(by_package.items(), key=lambda item: -item[1])
+
+
+def measure_startup() -> dict:
+    env = {**os.environ, **BENCH_ENV, "STARTUP_MODE": "lazy", "LOG_LEVEL": "WARNING"}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{process.stderr[-4000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["total_ms"] = result["import_ms"] + result["startup_ms"] + result["first_request_ms"]
+    result["imports"] = parse_importtime(process.stderr)
+    return result
+
+
+def format_result(result: dict, top: int = 10) -> str:
+    lines = [
+        f"import         {result['import_ms']:8.1f} ms",
+        f"startup        {result['startup_ms']:8.1f} ms",
+        f"first request  {result['first_request_ms']:8.1f} ms  (status {result['status']})",
+        f"total          {result['total_ms']:8.1f} ms",
+        "",
+        "import self time by package:",
+    ]
+    lines.extend(f"  {package:<24}{ms:8.1f} ms" for package, ms in result["imports"][:top])
+    if result["deferred_loaded"]:
+        lines.append(f"\nloaded but expected to be deferred: {', '.join(result['deferred_loaded'])}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=None, help=f"Fail when the total exceeds this (e.g. {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list in the import breakdown")
+    args = parser.parse_args(argv)
+
+    result = measure_startup()
+    print(format_result(result, args.top))
+    failed = bool(result["deferred_loaded"]) or result["status"] != 200
+    if args.budget_ms is not None and result["total_ms"] > args.budget_ms:
+        print(f"\nover budget: {result['total_ms']:.1f} ms > {args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from tests.bench.benchmark import BASELINE_PATH, ROUTES, api_routes, find_regressions, load_app, run_benchmarks, settings_mismatch
+
+# Kept small so the suite stays quick; the committed baseline is recorded with the same settings:
+#   python -m tests.bench.benchmark --levels 1,8 --requests 40 --save-baseline
+QUICK_LEVELS = (1, 8)
+QUICK_REQUESTS = int(os.environ.get("BENCH_REQUESTS", "40"))
+# A p95 over 40 requests is the second slowest request, so a single GC pause can triple it; the
+# quick comparison uses the median instead (run --check with more requests to compare p95s)
+QUICK_THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "2.0"))
+QUICK_MIN_DELTA_MS = float(os.environ.get("BENCH_MIN_DELTA_MS", "5.0"))
+
+
+@pytest.fixture(scope="module")
+def results():
+    return asyncio.run(run_benchmarks(QUICK_LEVELS, QUICK_REQUESTS))
+
+
+def test_every_api_route_is_benchmarked():
+    server = load_app()
+    covered = {f"{spec.method} {spec.path}" for spec in ROUTES}
+    assert set(api_routes(server)) <= covered
+
+
+def test_routes_respond_without_errors(results):
+    failures = {
+        f"{route} @ {level}": stats["errors"]
+        for route, levels in results["routes"].items()
+        for level, stats in levels.items()
+        if stats["errors"]
+    }
+    assert not failures
+
+
+def test_no_latency_regressions(results):
+    if not BASELINE_PATH.exists():
+        message = f"no benchmark baseline at {BASELINE_PATH}; record one with python -m tests.bench.benchmark --levels 1,8 --requests 40 --save-baseline"
+        # A missing baseline in CI would silently turn this test off
+        if os.environ.get("CI"):
+            pytest.fail(message)
+        pytest.skip(message)
+    baseline = json.loads(BASELINE_PATH.read_text())
+    mismatch = settings_mismatch(baseline, QUICK_LEVELS, QUICK_REQUESTS)
+    if mismatch:
+        pytest.skip(mismatch)
+    assert not find_regressions(results, baseline, QUICK_THRESHOLD, QUICK_MIN_DELTA_MS, percentile="p50")
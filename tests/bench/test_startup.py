@@ -0,0 +1,11 @@
+import os
+
+from tests.bench.startup import DEFAULT_BUDGET_MS, format_result, measure_startup
+
+
+def test_cold_start_within_budget():
+    budget = float(os.environ.get("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS))
+    result = measure_startup()
+    assert result["status"] == 200
+    assert not result["deferred_loaded"], format_result(result)
+    assert result["total_ms"] <= budget, format_result(result)
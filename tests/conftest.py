@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Backend modules import each other by their top-level names, as when run from backend/
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,497 @@
+"""In-memory stand-in for the parts of Motor's API the backend uses.
+
+Documents live in plain lists and every query is a linear scan, so absolute
+timings are not comparable with a real server; what the benchmarks track is
+the application's own overhead on top of a constant-cost database.
+"""
+
+import copy
+import re
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import InsertOne, ReturnDocument, UpdateMany, UpdateOne, DeleteOne, DeleteMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+_MISSING = object()
+
+
+def _get(document, path):
+    value = document
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set(document, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+
+def _unset(document, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.get(part, {})
+    document.pop(parts[-1], None)
+
+
+def _comparable(a, b):
+    return a is not _MISSING and a is not None and b is not None and (
+        type(a) is type(b) or (isinstance(a, (int, float)) and isinstance(b, (int, float)))
+        or (isinstance(a, datetime) and isinstance(b, datetime))
+    )
+
+
+def _matches_operator(value, operator, argument):
+    if operator == "$eq":
+        return _matches_value(value, argument)
+    if operator == "$ne":
+        return not _matches_value(value, argument)
+    if operator == "$in":
+        return any(_matches_value(value, item) for item in argument)
+    if operator == "$nin":
+        return not any(_matches_value(value, item) for item in argument)
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(argument)
+    if operator == "$regex":
+        return isinstance(value, str) and re.search(argument, value) is not None
+    if operator == "$options":
+        return True
+    if operator in ("$lt", "$lte", "$gt", "$gte"):
+        if not _comparable(value, argument):
+            return False
+        return {
+            "$lt": value < argument,
+            "$lte": value <= argument,
+            "$gt": value > argument,
+            "$gte": value >= argument,
+        }[operator]
+    raise NotImplementedError(f"Query operator {operator} is not supported by the fake")
+
+
+def _matches_value(value, expected):
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    if value is _MISSING:
+        return expected is None
+    return value == expected
+
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            value = _get(document, key)
+            if not all(_matches_operator(value, op, arg) for op, arg in condition.items()):
+                return False
+        elif not _matches_value(_get(document, key), condition):
+            return False
+    return True
+
+
+def _project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    include = {key for key, flag in projection.items() if flag and key != "_id"}
+    if include:
+        result = {key: copy.deepcopy(document[key]) for key in include if key in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+    return {key: copy.deepcopy(value) for key, value in document.items() if projection.get(key, 1)}
+
+
+def _sort_key(value):
+    # Missing and None sort first, as in Mongo; other types sort by type name then value
+    if value is _MISSING or value is None:
+        return (0, "", 0)
+    if isinstance(value, (int, float)):
+        return (1, "number", value)
+    return (1, type(value).__name__, value)
+
+
+def _apply_update(document, update, inserting=False):
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == "$set":
+                _set(document, path, copy.deepcopy(value))
+            elif operator == "$setOnInsert":
+                if inserting:
+                    _set(document, path, copy.deepcopy(value))
+            elif operator == "$inc":
+                current = _get(document, path)
+                _set(document, path, (0 if current is _MISSING else current) + value)
+            elif operator == "$unset":
+                _unset(document, path)
+            elif operator == "$max":
+                current = _get(document, path)
+                if current is _MISSING or value > current:
+                    _set(document, path, value)
+            else:
+                raise NotImplementedError(f"Update operator {operator} is not supported by the fake")
+
+
+class FakeCursor:
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+
+    def sort(self, key, direction=None):
+        self._sort = [(key, direction or 1)] if isinstance(key, str) else list(key)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def _evaluate(self):
+        documents = [doc for doc in self._collection._documents if matches(doc, self._query)]
+        for key, direction in reversed(self._sort):
+            documents.sort(key=lambda doc: _sort_key(_get(doc, key)), reverse=direction < 0)
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return [_project(doc, self._projection) for doc in documents]
+
+    async def to_list(self, length=None):
+        results = self._evaluate()
+        return results if length is None else results[:length]
+
+    def __aiter__(self):
+        self._results = iter(self._evaluate())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def explain(self):
+        return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "fake"}}}}
+
+    async def close(self):
+        pass
+
+
+def _evaluate_expression(document, expression):
+    # The few aggregation expressions the backend uses: field paths, $dateToString and literals
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(document, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, dict):
+        if "$dateToString" in expression:
+            spec = expression["$dateToString"]
+            value = _evaluate_expression(document, spec["date"])
+            return value.strftime(spec["format"]) if value is not None else None
+        return {key: _evaluate_expression(document, value) for key, value in expression.items()}
+    return expression
+
+
+def _group(documents, spec):
+    groups = {}
+    for document in documents:
+        key = _evaluate_expression(document, spec["_id"])
+        hashable = repr(key)
+        if hashable not in groups:
+            groups[hashable] = {"_id": key, **{field: 0 for field in spec if field != "_id"}}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            operator, argument = next(iter(accumulator.items()))
+            if operator != "$sum":
+                raise NotImplementedError(f"fake_motor does not support {operator}")
+            groups[hashable][field] += _evaluate_expression(document, argument) or 0
+    return list(groups.values())
+
+
+class FakeAggregationCursor:
+    def __init__(self, results):
+        self._results = results
+
+    async def to_list(self, length=None):
+        return self._results if length is None else self._results[:length]
+
+    def __aiter__(self):
+        self._iterator = iter(self._results)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self._documents = []
+        self._indexes = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        self._unique_cache = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.database[f"{self.name}.{name}"]
+
+    # Indexes
+
+    def _unique_fields(self):
+        return [spec["key"][0][0] for spec in self._indexes.values() if spec.get("unique") and len(spec["key"]) == 1]
+
+    async def create_index(self, keys, name=None, unique=False, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        self._indexes[name] = {"key": keys, "unique": unique, **kwargs}
+        self._unique_cache.clear()
+        return name
+
+    async def create_indexes(self, indexes):
+        names = []
+        for index in indexes:
+            document = dict(index.document)
+            keys = list(document.pop("key").items())
+            names.append(await self.create_index(keys, **document))
+        return names
+
+    async def index_information(self):
+        return copy.deepcopy(self._indexes)
+
+    # Writes
+
+    def _unique_values(self, field):
+        # Values of each uniquely indexed field, rebuilt after deletes; updates never change them here
+        if field not in self._unique_cache:
+            self._unique_cache[field] = {_get(doc, field) for doc in self._documents} - {_MISSING}
+        return self._unique_cache[field]
+
+    def _insert(self, document):
+        document.setdefault("_id", ObjectId())
+        stored = copy.deepcopy(document)
+        fields = self._unique_fields()
+        for field in fields:
+            if _get(stored, field) in self._unique_values(field):
+                raise DuplicateKeyError(f"E11000 duplicate key error: {field}", 11000)
+        for field in fields:
+            value = _get(stored, field)
+            if value is not _MISSING:
+                self._unique_values(field).add(value)
+        self._documents.append(stored)
+        return document["_id"]
+
+    async def insert_one(self, document, **kwargs):
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents, ordered=True, **kwargs):
+        ids, errors = [], []
+        for position, document in enumerate(documents):
+            try:
+                ids.append(self._insert(document))
+            except DuplicateKeyError as e:
+                errors.append({"index": position, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": len(ids)})
+        return InsertManyResult(ids, True)
+
+    def _update(self, query, update, many, upsert):
+        matched = modified = 0
+        upserted_id = None
+        for document in self._documents:
+            if not matches(document, query):
+                continue
+            matched += 1
+            before = copy.deepcopy(document)
+            _apply_update(document, update)
+            if document != before:
+                modified += 1
+            if not many:
+                break
+        if not matched and upsert:
+            document = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+            _apply_update(document, update, inserting=True)
+            upserted_id = self._insert(document)
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def update_one(self, query, update, upsert=False, **kwargs):
+        return self._update(query, update, many=False, upsert=upsert)
+
+    async def update_many(self, query, update, upsert=False, **kwargs):
+        return self._update(query, update, many=True, upsert=upsert)
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False, return_document=ReturnDocument.BEFORE, **kwargs):
+        before = next((copy.deepcopy(doc) for doc in self._documents if matches(doc, query)), None)
+        result = self._update(query, update, many=False, upsert=upsert)
+        if return_document == ReturnDocument.BEFORE:
+            return _project(before, projection) if before is not None else None
+        target = {"_id": before["_id"]} if before is not None else {"_id": result.upserted_id}
+        return await self.find_one(target, projection)
+
+    async def replace_one(self, query, replacement, upsert=False, **kwargs):
+        for position, document in enumerate(self._documents):
+            if matches(document, query):
+                replacement = {**copy.deepcopy(replacement), "_id": document["_id"]}
+                self._documents[position] = replacement
+                self._unique_cache.clear()
+                return UpdateResult({"n": 1, "nModified": 1}, True)
+        if upsert:
+            document = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+            document.update(copy.deepcopy(replacement))
+            return UpdateResult({"n": 1, "nModified": 0, "upserted": self._insert(document)}, True)
+        return UpdateResult({"n": 0, "nModified": 0}, True)
+
+    async def delete_one(self, query, **kwargs):
+        for document in self._documents:
+            if matches(document, query):
+                self._documents.remove(document)
+                self._unique_cache.clear()
+                return DeleteResult({"n": 1}, True)
+        return DeleteResult({"n": 0}, True)
+
+    async def delete_many(self, query, **kwargs):
+        before = len(self._documents)
+        self._documents = [doc for doc in self._documents if not matches(doc, query)]
+        self._unique_cache.clear()
+        return DeleteResult({"n": before - len(self._documents)}, True)
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0, "upserted": [], "writeErrors": [], "writeConcernErrors": []}
+        for request in requests:
+            if isinstance(request, InsertOne):
+                self._insert(request._doc)
+                counts["nInserted"] += 1
+            elif isinstance(request, (UpdateOne, UpdateMany)):
+                result = self._update(request._filter, request._doc, many=isinstance(request, UpdateMany), upsert=bool(request._upsert))
+                if result.upserted_id is not None:
+                    counts["nUpserted"] += 1
+                else:
+                    counts["nMatched"] += result.matched_count
+                counts["nModified"] += result.modified_count
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                result = await (self.delete_many if isinstance(request, DeleteMany) else self.delete_one)(request._filter)
+                counts["nRemoved"] += result.deleted_count
+            else:
+                raise NotImplementedError(f"Bulk operation {type(request).__name__} is not supported by the fake")
+        return BulkWriteResult(counts, True)
+
+    # Reads
+
+    def find(self, query=None, projection=None, **kwargs):
+        return FakeCursor(self, query, projection)
+
+    async def find_one(self, query=None, projection=None, **kwargs):
+        results = await FakeCursor(self, query, projection).limit(1).to_list(1)
+        return results[0] if results else None
+
+    def aggregate(self, pipeline, **kwargs):
+        documents = [copy.deepcopy(doc) for doc in self._documents]
+        for stage in pipeline:
+            operator, spec = next(iter(stage.items()))
+            if operator == "$match":
+                documents = [doc for doc in documents if matches(doc, spec)]
+            elif operator == "$group":
+                documents = _group(documents, spec)
+            elif operator == "$sort":
+                for key, direction in reversed(list(spec.items())):
+                    documents.sort(key=lambda doc: _sort_key(_get(doc, key)), reverse=direction < 0)
+            elif operator == "$limit":
+                documents = documents[:spec]
+            else:
+                raise NotImplementedError(f"fake_motor does not support {operator}")
+        return FakeAggregationCursor(documents)
+
+    async def count_documents(self, query, **kwargs):
+        return sum(1 for doc in self._documents if matches(doc, query))
+
+    async def estimated_document_count(self, **kwargs):
+        return len(self._documents)
+
+
+class FakeDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, command, *args, **kwargs):
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        if name == "explain":
+            return {"queryPlanner": {"winningPlan": {"stage": "UPDATE", "inputStage": {"stage": "IXSCAN", "indexName": "fake"}}}, "ok": 1.0}
+        raise NotImplementedError(f"Command {name} is not supported by the fake")
+
+    async def list_collection_names(self):
+        return list(self._collections)
+
+
+class FakeMotorClient:
+    """Drop-in for AsyncIOMotorClient; accepts and ignores connection options.
+
+    Every instance sees the same databases, as clients connected to one server
+    would, so data seeded through one client is visible to the app's own.
+    """
+
+    _databases = {}
+
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+
+    @classmethod
+    def reset(cls):
+        cls._databases.clear()
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self, name)
+        return self._databases[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,119 @@
+"""Minimal local SMTP server that keeps every message it receives, for tests only.
+
+It speaks just enough SMTP for smtplib without STARTTLS or AUTH, so point the
+notifier at it with NOTIFY_SMTP_SECURITY=none:
+
+    python -m tests.smtp_sink --port 1025     # print messages as they arrive
+"""
+
+import argparse
+import asyncio
+import email
+from email import policy
+from email.message import EmailMessage
+from typing import List, Optional
+
+
+class SMTPSink:
+    """Accepts mail on `host`:`port` (0 picks a free port) and appends it to `messages`.
+
+    The first `fail_first` messages are rejected with a transient 451 error,
+    to exercise the sender's retries.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fail_first: int = 0, verbose: bool = False):
+        self.host = host
+        self.port = port
+        self.fail_first = fail_first
+        self.verbose = verbose
+        self.messages: List[EmailMessage] = []
+        self.rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._received = asyncio.Condition()
+
+    async def __aenter__(self) -> "SMTPSink":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def wait_for(self, count: int, timeout: float = 5.0) -> List[EmailMessage]:
+        """Wait until at least `count` messages have been received."""
+        async with self._received:
+            await asyncio.wait_for(self._received.wait_for(lambda: len(self.messages) >= count), timeout)
+        return self.messages
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+
+        reply("220 smtp-sink ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    reply("250 smtp-sink")
+                elif command.startswith(("MAIL FROM", "RCPT TO", "RSET", "NOOP")):
+                    reply("250 OK")
+                elif command == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    await self._receive(reader, reply)
+                elif command == "QUIT":
+                    reply("221 Bye")
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _receive(self, reader: asyncio.StreamReader, reply):
+        lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b".\r\n", b".\n", b""):
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        if self.rejected < self.fail_first:
+            self.rejected += 1
+            reply("451 Temporary failure, try again later")
+            return
+        message = email.message_from_bytes(b"".join(lines), policy=policy.default)
+        async with self._received:
+            self.messages.append(message)
+            self._received.notify_all()
+        if self.verbose:
+            print(f"--- {message['Subject']} ({message['To']})\n{message.get_content()}", flush=True)
+        reply("250 OK: queued")
+
+
+async def _serve(host: str, port: int):
+    sink = SMTPSink(host, port, verbose=True)
+    await sink.start()
+    print(f"SMTP sink listening on {host}:{sink.port}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from analytics import DailyRollups, user_agent_family
+from tests.app_client import app_client
+from tests.fake_motor import FakeMotorClient
+
+DAY = datetime(2024, 5, 1, 12)
+
+
+def _rollups() -> DailyRollups:
+    FakeMotorClient.reset()
+    return DailyRollups(FakeMotorClient()["test"].contact_stats_daily)
+
+
+def test_user_agent_families():
+    assert user_agent_family("Mozilla/5.0 (X11) Gecko/20100101 Firefox/125.0") == "Firefox"
+    assert user_agent_family("curl/8.0") == "script"
+    assert user_agent_family(None) == "unknown"
+
+
+def test_inserts_and_status_changes_are_counted_per_day():
+    rollups = _rollups()
+    rollups.record_inserts([
+        {"timestamp": DAY, "status": "new", "user_agent": "curl/8.0"},
+        {"timestamp": DAY, "status": "new", "user_agent": None},
+        {"timestamp": DAY + timedelta(days=1), "status": "new", "user_agent": None},
+    ])
+
+    async def run():
+        await rollups.flush()
+        rollups.record_status_changes([{"timestamp": DAY, "status": "new"}, {"timestamp": DAY, "status": "read"}], "read")
+        rollups.record_counts([{"day": "2024-05-02", "status": "new", "count": 1}], "spam")
+        # Unflushed increments are included, and survive the flush unchanged
+        before = await rollups.query(date(2024, 4, 30), date(2024, 5, 2))
+        await rollups.flush()
+        return before, await rollups.query(date(2024, 4, 30), date(2024, 5, 2))
+
+    before, after = asyncio.run(run())
+    assert before == after
+    empty, first, second = after["days"]
+    assert empty["total"] == 0 and empty["status"]["new"] == 0
+    assert first["total"] == 2 and first["status"]["new"] == 1 and first["status"]["read"] == 1
+    assert first["user_agents"] == {"script": 1, "unknown": 1}
+    assert second["status"]["new"] == 0 and second["status"]["spam"] == 1
+    assert after["totals"]["total"] == 3
+    assert after["totals"]["status"] == {"new": 1, "read": 1, "responded": 0, "spam": 1}
+
+
+def test_messages_stored_before_the_rollups_existed_are_backfilled():
+    async def run():
+        async with app_client(messages=5) as (server, client):
+            ids = [message["id"] for message in (await client.get("/api/contact/messages")).json()["messages"]]
+            await client.patch("/api/contact/messages/status", json={"status": "read", "ids": ids})
+            since = (datetime.utcnow() - timedelta(days=31)).date()
+            return (await client.get("/api/analytics/messages", params={"since": since.isoformat()})).json()
+
+    totals = asyncio.run(run())["totals"]
+    assert totals["total"] == 5
+    assert totals["status"]["new"] == 0 and totals["status"]["read"] == 5
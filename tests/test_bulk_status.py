@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from tests.app_client import app_client
+
+ENDPOINT = "/api/contact/messages/status"
+
+
+def _run(requests, messages: int = 6):
+    """Send `requests(ids)` bulk updates in order; returns the responses and the final status per message id."""
+    async def run():
+        async with app_client(messages=messages) as (server, client):
+            listed = (await client.get("/api/contact/messages", params={"include_spam": True})).json()["messages"]
+            # Oldest first, so ids[0] is the first seeded message
+            ids = [message["id"] for message in reversed(listed)]
+            responses = [await client.patch(ENDPOINT, json=body) for body in requests(ids)]
+            stored = (await client.get("/api/contact/messages", params={"include_spam": True})).json()["messages"]
+            return ids, responses, {message["id"]: message["status"] for message in stored}
+
+    return asyncio.run(run())
+
+
+def test_ids_report_an_outcome_each():
+    ids, (first, second), statuses = _run(lambda ids: [
+        {"status": "read", "ids": ids[:2]},
+        # ids[0] is already read, ids[2] and its repeat count once, the last id doesn't exist
+        {"status": "read", "ids": [ids[0], ids[2], ids[2], "missing"]},
+    ])
+    assert first.json() == {
+        "success": True, "matched_count": 2, "modified_count": 2,
+        "results": {ids[0]: "updated", ids[1]: "updated"},
+    }
+    body = second.json()
+    assert body["results"] == {ids[0]: "unchanged", ids[2]: "updated", "missing": "not_found"}
+    assert list(body["results"]) == [ids[0], ids[2], "missing"]
+    assert body["modified_count"] == 1
+    assert [statuses[message_id] for message_id in ids] == ["read", "read", "read", "new", "new", "new"]
+
+
+def test_filter_reports_matched_and_modified_counts():
+    now = datetime.utcnow()
+    ids, (spam, read), statuses = _run(lambda ids: [
+        # The seeded messages are 30 days old, one minute apart
+        {"status": "spam", "filter": {"until": (now - timedelta(days=30) + timedelta(minutes=2, seconds=30)).isoformat()}},
+        {"status": "read", "filter": {"status": "new"}},
+    ])
+    assert spam.json()["matched_count"] == 3 and spam.json()["modified_count"] == 3
+    assert spam.json()["results"] is None
+    assert read.json()["matched_count"] == 3 and read.json()["modified_count"] == 3
+    assert [statuses[message_id] for message_id in ids] == ["spam"] * 3 + ["read"] * 3
+
+
+def test_exactly_one_of_ids_or_filter_is_required():
+    _, responses, statuses = _run(lambda ids: [
+        {"status": "read"},
+        {"status": "read", "ids": ids[:1], "filter": {"status": "new"}},
+        {"status": "read", "filter": {}},
+        {"status": "read", "ids": []},
+        {"status": "archived", "ids": ids[:1]},
+    ])
+    assert [response.status_code for response in responses] == [422] * 5
+    assert set(statuses.values()) == {"new"}
@@ -0,0 +1,41 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+
+from export import export_messages
+from tests.fake_motor import FakeMotorClient
+
+DOCUMENT = {
+    "id": "m1", "timestamp": datetime(2024, 5, 1, 12), "name": "=HYPERLINK(\"http://evil\")", "email": "@visitor@example.com",
+    "subject": "+1 idea", "message": "-2 points\nsecond line", "status": "new", "ip_address": "\t10.0.0.1", "user_agent": "\rMozilla",
+}
+
+
+def _export(fmt: str) -> bytes:
+    FakeMotorClient.reset()
+    collection = FakeMotorClient()["test"].contact_messages
+
+    async def run():
+        await collection.insert_one(dict(DOCUMENT))
+        return b"".join([chunk async for chunk in export_messages(collection, {}, fmt)])
+
+    return asyncio.run(run())
+
+
+def test_csv_cells_that_look_like_formulas_are_escaped():
+    header, row = list(csv.reader(io.StringIO(_export("csv").decode())))
+    values = dict(zip(header, row))
+    assert values["name"] == "'=HYPERLINK(\"http://evil\")"
+    assert values["email"] == "'@visitor@example.com"
+    assert values["subject"] == "'+1 idea"
+    assert values["message"].startswith("'-2 points")
+    assert values["ip_address"] == "'\t10.0.0.1"
+    assert values["user_agent"] == "'\rMozilla"
+    assert values["id"] == "m1" and values["timestamp"] == "2024-05-01T12:00:00"
+
+
+def test_ndjson_keeps_values_as_stored():
+    document = json.loads(_export("ndjson"))
+    assert document["name"] == DOCUMENT["name"] and document["subject"] == "+1 idea"
@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from http_cache import NO_STORE, HTTPCacheMiddleware
+
+POLICY = "public, max-age=3600"
+BODY = "portfolio " * 300
+
+app = FastAPI()
+
+
+@app.get("/cached")
+async def cached(fail: int = 0):
+    if fail:
+        raise HTTPException(status_code=fail, detail="Unavailable")
+    return PlainTextResponse(BODY)
+
+
+@app.get("/small")
+async def small():
+    return PlainTextResponse("tiny")
+
+
+@app.get("/stream")
+async def stream():
+    async def chunks():
+        yield b"first\n"
+        yield b"second\n"
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+@app.post("/cached")
+async def post_cached():
+    return PlainTextResponse(BODY)
+
+
+app.add_middleware(HTTPCacheMiddleware, policies={"/cached": POLICY, "/stream": POLICY})
+
+
+def _get(*requests):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, url, headers=headers) for method, url, headers in requests]
+
+    return asyncio.run(run())
+
+
+def test_route_policy_only_applies_to_successful_gets():
+    ok, bad_request, unavailable, posted = _get(
+        ("GET", "/cached", {}),
+        ("GET", "/cached?fail=400", {}),
+        ("GET", "/cached?fail=503", {}),
+        ("POST", "/cached", {}),
+    )
+    assert ok.headers["cache-control"] == POLICY
+    assert bad_request.status_code == 400 and bad_request.headers["cache-control"] == NO_STORE
+    assert unavailable.status_code == 503 and unavailable.headers["cache-control"] == NO_STORE
+    assert posted.headers["cache-control"] == NO_STORE
+
+
+def test_gzip_is_negotiated_above_the_minimum_size():
+    compressed, identity, small = _get(
+        ("GET", "/cached", {"Accept-Encoding": "gzip"}),
+        ("GET", "/cached", {"Accept-Encoding": "identity"}),
+        ("GET", "/small", {"Accept-Encoding": "gzip"}),
+    )
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    # httpx decodes the body; the wire size is what shrank
+    assert compressed.text == BODY
+    assert int(compressed.headers["content-length"]) == len(gzip.compress(BODY.encode(), compresslevel=6, mtime=0))
+    assert "content-encoding" not in identity.headers and identity.text == BODY
+    assert "content-encoding" not in small.headers and "vary" not in small.headers
+
+
+def test_weak_etag_answers_conditional_requests_with_304():
+    (first,) = _get(("GET", "/cached", {}))
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    matched, changed = _get(
+        ("GET", "/cached", {"If-None-Match": etag}),
+        ("GET", "/cached", {"If-None-Match": 'W/"something-else"'}),
+    )
+    assert matched.status_code == 304 and matched.content == b""
+    assert matched.headers["etag"] == etag and "content-type" not in matched.headers
+    assert changed.status_code == 200 and changed.text == BODY
+
+
+def test_streaming_responses_pass_through():
+    (streamed,) = _get(("GET", "/stream", {"Accept-Encoding": "gzip"}))
+    assert streamed.text == "first\nsecond\n"
+    assert streamed.headers["cache-control"] == POLICY
+    assert "content-encoding" not in streamed.headers and "etag" not in streamed.headers
@@ -0,0 +1,79 @@
+import asyncio
+
+from ingest import SPILL_PREFIX, ContactWriteBehindQueue, QueueFullError
+from models import ContactMessage
+from tests.fake_motor import FakeMotorClient
+
+
+def _message(n: int) -> ContactMessage:
+    return ContactMessage(name=f"Visitor {n}", email=f"v{n}@example.com", subject="Hello", message=f"Message {n}")
+
+
+def _collection():
+    FakeMotorClient.reset()
+    return FakeMotorClient()["test"].contact_messages
+
+
+def test_queued_messages_are_written_in_batches_and_on_stop(tmp_path):
+    collection = _collection()
+    stored = []
+
+    async def run():
+        queue = ContactWriteBehindQueue(collection, tmp_path, batch_size=2, flush_interval=60, on_stored=stored.append)
+        await queue.start()
+        for n in range(3):
+            await queue.submit(_message(n))
+        # A full batch is written without waiting for the flush interval
+        for _ in range(100):
+            if stored:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert [len(batch) for batch in stored] == [2, 1]
+    assert sorted(document["name"] for document in collection._documents) == ["Visitor 0", "Visitor 1", "Visitor 2"]
+    # Everything reached Mongo, so no spill file is left to replay
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spilled_messages_are_replayed_once_on_start(tmp_path):
+    collection = _collection()
+    messages = [_message(n) for n in range(3)]
+    # A previous process crashed after writing the first message to Mongo
+    (tmp_path / f"{SPILL_PREFIX}.jsonl").write_text("".join(message.model_dump_json() + "\n" for message in messages))
+
+    async def run():
+        await collection.create_index("id", unique=True)
+        await collection.insert_one(messages[0].model_dump())
+        queue = ContactWriteBehindQueue(collection, tmp_path, on_stored=stored.extend)
+        await queue.start()
+        await queue.stop()
+
+    stored = []
+    asyncio.run(run())
+    assert sorted(document["id"] for document in collection._documents) == sorted(message.id for message in messages)
+    # Digests, rollups and the live feed only hear about the messages this replay stored
+    assert sorted(document["id"] for document in stored) == sorted(message.id for message in messages[1:])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_submit_fails_when_the_queue_stays_full(tmp_path):
+    collection = _collection()
+
+    async def run():
+        # The flush loop holds the first message until the interval ends, so the queue fills
+        queue = ContactWriteBehindQueue(collection, tmp_path, max_size=1, flush_interval=60, submit_timeout=0.01)
+        await queue.start()
+        try:
+            for n in range(3):
+                await queue.submit(_message(n))
+                await asyncio.sleep(0)
+        except QueueFullError:
+            return n
+        finally:
+            await queue.stop()
+
+    assert asyncio.run(run()) == 2
+    # Only the accepted messages are stored
+    assert len(collection._documents) == 2
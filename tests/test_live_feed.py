@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from live_feed import LiveFeed
+
+
+def _parse(chunks):
+    """(id, event, data) for each event frame, skipping the retry line and pings."""
+    events = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.decode().splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def _collect(feed: LiveFeed, publish=None, **kwargs):
+    """Open a stream, run `publish` once it is subscribed, and read it until it ends."""
+    stream = feed.stream(**kwargs)
+    chunks = [await stream.__anext__()]
+    if publish is not None:
+        publish()
+    async for chunk in stream:
+        chunks.append(chunk)
+    return _parse(chunks)
+
+
+def _messages(feed: LiveFeed, *names):
+    for name in names:
+        feed.publish_local("message", {"id": name, "status": "new"})
+
+
+def test_reconnecting_client_gets_what_it_missed():
+    feed = LiveFeed()
+
+    async def run():
+        first = await _collect(feed, lambda: _messages(feed, "m1"), max_duration=0.05)
+        _messages(feed, "m2", "m3")
+        return first, await _collect(feed, last_event_id=first[-1][0], max_duration=0.05)
+
+    first, resumed = asyncio.run(run())
+    assert [data["id"] for _, _, data in first] == ["m1"]
+    assert [data["id"] for _, _, data in resumed] == ["m2", "m3"]
+
+
+def test_unknown_last_event_id_gets_a_reset():
+    feed = LiveFeed(history=2)
+
+    async def run():
+        first = await _collect(feed, lambda: _messages(feed, "m1"), max_duration=0.05)
+        # m1 falls out of the history
+        _messages(feed, "m2", "m3")
+        return await _collect(feed, last_event_id=first[0][0], max_duration=0.05)
+
+    assert asyncio.run(run()) == [(None, "reset", {})]
+
+
+def test_spam_messages_are_hidden_unless_asked_for():
+    feed = LiveFeed()
+
+    def publish():
+        feed.publish_local("message", {"id": "m1", "status": "spam"})
+        feed.publish_local("status", {"id": "m1", "status": "spam"})
+        feed.publish_local("message", {"id": "m2", "status": "new"})
+
+    async def run():
+        return (
+            await _collect(feed, publish, max_duration=0.05),
+            await _collect(feed, publish, include_spam=True, max_duration=0.05),
+        )
+
+    hidden, shown = asyncio.run(run())
+    assert [(event, data["id"]) for _, event, data in hidden] == [("status", "m1"), ("message", "m2")]
+    assert [(event, data["id"]) for _, event, data in shown] == [("message", "m1"), ("status", "m1"), ("message", "m2")]
+
+
+def test_stream_ends_after_its_queue_overflows():
+    feed = LiveFeed(client_queue_size=2)
+
+    async def run():
+        # No max_duration: only the overflow can end this stream
+        return await asyncio.wait_for(_collect(feed, lambda: _messages(feed, "m1", "m2", "m3", "m4")), timeout=2)
+
+    events = asyncio.run(run())
+    assert [data["id"] for _, _, data in events] == ["m1", "m2"]
+    assert feed.clients == 0
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+
+from notifications import ContactNotifier, SMTPSender, build_digest
+from tests.smtp_sink import SMTPSink
+
+
+def _document(n: int, subject: str = "Hello") -> dict:
+    return {
+        "id": f"message-{n}", "name": f"Visitor {n}", "email": f"visitor{n}@example.com",
+        "subject": subject, "message": f"Message body {n}", "timestamp": datetime(2024, 5, 1, 12, 0, n),
+    }
+
+
+def _notifier(sink: SMTPSink, **options) -> ContactNotifier:
+    options = {"digest_window": 0.05, "backoff_base": 0.01, **options}
+    return ContactNotifier(SMTPSender(sink.host, sink.port, security="none", timeout=2), "portfolio@example.com", ["owner@example.com"], **options)
+
+
+def test_messages_within_the_window_go_out_as_one_digest():
+    async def run():
+        async with SMTPSink() as sink:
+            notifier = _notifier(sink)
+            notifier.start()
+            for n in range(3):
+                notifier.notify(_document(n))
+            messages = await sink.wait_for(1)
+            await notifier.stop()
+            return messages
+
+    messages = asyncio.run(run())
+    assert len(messages) == 1
+    assert messages[0]["Subject"] == "3 new contact messages"
+    body = messages[0].get_content()
+    assert all(f"Message body {n}" in body for n in range(3))
+
+
+def test_failed_sends_are_retried():
+    async def run():
+        async with SMTPSink(fail_first=2) as sink:
+            notifier = _notifier(sink, max_attempts=3)
+            notifier.start()
+            notifier.notify(_document(1))
+            messages = await sink.wait_for(1)
+            await notifier.stop()
+            return sink.rejected, messages
+
+    rejected, messages = asyncio.run(run())
+    assert rejected == 2
+    assert messages[0]["Subject"] == "New contact message: Hello"
+
+
+def test_line_breaks_in_a_subject_do_not_add_headers():
+    message = build_digest([_document(1, "Hi\r\nBcc: attacker@example.com")], "portfolio@example.com", ["owner@example.com"])
+    assert message["Bcc"] is None
+    assert "\n" not in message["Subject"]
+
+
+def test_a_bad_message_does_not_stop_later_digests():
+    async def run():
+        async with SMTPSink() as sink:
+            notifier = _notifier(sink)
+            notifier.start()
+            # Missing fields make this batch's digest fail to build
+            notifier.notify({"id": "broken"})
+            await asyncio.sleep(0.2)
+            notifier.notify(_document(2, "Still delivered"))
+            messages = await sink.wait_for(1)
+            await notifier.stop()
+            return messages
+
+    messages = asyncio.run(run())
+    assert messages[0]["Subject"] == "New contact message: Still delivered"
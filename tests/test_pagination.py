@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from pagination import InvalidCursorError, decode_cursor, encode_cursor
+from tests.app_client import app_client
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2024, 5, 1, 12, 30, 15, 123000)
+    assert decode_cursor(encode_cursor(timestamp, "m1")) == (timestamp, "m1")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_every_message_once_newest_first():
+    async def run():
+        async with app_client(messages=25) as (server, client):
+            pages, cursor = [], None
+            while True:
+                params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+                body = (await client.get("/api/contact/messages", params=params)).json()
+                pages.append(body["messages"])
+                cursor = body["next_cursor"]
+                if cursor is None:
+                    return pages, (await client.get("/api/contact/messages", params={"cursor": "bogus"})).status_code
+
+    pages, invalid_status = asyncio.run(run())
+    assert [len(page) for page in pages] == [10, 10, 5]
+    messages = [message for page in pages for message in page]
+    assert len({message["id"] for message in messages}) == 25
+    timestamps = [message["timestamp"] for message in messages]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert invalid_status == 400
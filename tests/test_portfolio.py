@@ -0,0 +1,77 @@
+import asyncio
+import copy
+
+from models import PortfolioData
+from portfolio import PORTFOLIO_DOCUMENT_ID, PortfolioStore
+from tests.bench.benchmark import PORTFOLIO
+from tests.fake_motor import FakeMotorClient
+
+
+def _collection():
+    FakeMotorClient.reset()
+    return FakeMotorClient()["test"].portfolio
+
+
+def _retitled(title: str) -> PortfolioData:
+    data = copy.deepcopy(PORTFOLIO)
+    data["personal"]["name"] = title
+    return PortfolioData.model_validate(data)
+
+
+def test_update_refreshes_body_etag_and_version():
+    store = PortfolioStore(_collection())
+
+    async def run():
+        await store.load()
+        empty = (store.body, store.etag, store.version)
+        first = await store.update(_retitled("First"))
+        body, etag = store.body, store.etag
+        second = await store.update(_retitled("Second"))
+        return empty, (first, body, etag), (second, store.body, store.etag)
+
+    empty, (first, first_body, first_etag), (second, second_body, second_etag) = asyncio.run(run())
+    assert empty == (None, None, None)
+    assert (first, second) == (1, 2)
+    assert b'"First"' in first_body and b'"Second"' in second_body
+    assert first_etag != second_etag
+
+
+def test_other_workers_updates_are_picked_up_after_the_interval():
+    collection = _collection()
+    store = PortfolioStore(collection, revalidate_interval=0.05)
+    other_worker = PortfolioStore(collection)
+
+    async def run():
+        await store.update(_retitled("First"))
+        await store.load()
+        await other_worker.update(_retitled("Second"))
+        # Within the interval the cached copy is served without asking Mongo
+        await store.revalidate()
+        cached = (store.version, store.etag)
+        await asyncio.sleep(0.06)
+        await store.revalidate()
+        return cached, (store.version, store.etag, store.data.personal.name)
+
+    (cached_version, cached_etag), (version, etag, name) = asyncio.run(run())
+    assert cached_version == 1
+    assert (version, name) == (2, "Second")
+    assert etag != cached_etag
+
+
+def test_revalidate_keeps_the_cache_when_the_version_is_unchanged():
+    collection = _collection()
+    store = PortfolioStore(collection, revalidate_interval=0)
+
+    async def run():
+        await store.update(_retitled("First"))
+        data = store.data
+        await store.revalidate()
+        # A reload would have replaced the parsed model
+        unchanged = store.data is data
+        await collection.delete_one({"_id": PORTFOLIO_DOCUMENT_ID})
+        await store.revalidate()
+        return unchanged, store.body
+
+    unchanged, body = asyncio.run(run())
+    assert unchanged
+    assert body is None
@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from portfolio_index import PortfolioIndex, parse_duration
+
+PROJECTS = [
+    {"id": 1, "title": "Chat app", "description": "Realtime messaging", "technologies": ["React", "Node.js"],
+     "category": "Web", "duration": "Jan 2024 - Mar 2024", "metrics": {"users": "500+ users"}},
+    {"id": 2, "title": "Search service", "description": "Full text search over messages", "technologies": ["Python", "MongoDB"],
+     "category": "Backend", "duration": "2023 - 2024", "metrics": {"users": "1,200 users"}},
+    {"id": 3, "title": "Portfolio", "description": "This site", "technologies": ["React", "Python"],
+     "category": "Web", "duration": "Aug 2024 - Present", "metrics": {}},
+]
+
+
+def _index() -> PortfolioIndex:
+    index = PortfolioIndex(keyword_fields=("title", "description"), category_field="category")
+    index.update([dict(project) for project in PROJECTS])
+    return index
+
+
+def test_parse_duration():
+    assert parse_duration("May 2024 – Jul 2024") == (2024 * 12 + 4, 2024 * 12 + 6)
+    assert parse_duration("Aug 2024 - Present") == (2024 * 12 + 7, None)
+    assert parse_duration("sometime") is None
+
+
+def test_filters_intersect_and_keep_portfolio_order():
+    index = _index()
+    assert [item["id"] for item in index.query(technologies=["react"])] == [1, 3]
+    assert [item["id"] for item in index.query(technologies=["React", "Python"])] == [3]
+    assert [item["id"] for item in index.query(category="web", keyword="realtime")] == [1]
+    assert index.query(technologies=["Go"]) == []
+
+
+def test_sorts_put_items_without_a_value_last():
+    index = _index()
+    today = date(2024, 12, 1)
+    assert [item["id"] for item in index.query(sort="duration", today=today)] == [2, 3, 1]
+    assert [item["id"] for item in index.query(sort="metric:users", descending=False)] == [1, 2, 3]
+    with pytest.raises(ValueError):
+        index.query(sort="stars")
+
+
+def test_update_reindexes_only_changed_items():
+    index = _index()
+    changed = [dict(project) for project in PROJECTS[:2]]
+    changed[0]["technologies"] = ["Vue"]
+    assert index.update(changed) == 2  # project 1 changed, project 3 removed
+    assert [item["id"] for item in index.query(technologies=["React"])] == []
+    assert [item["id"] for item in index.query(technologies=["vue"])] == [1]
+    assert len(index) == 2
@@ -0,0 +1,46 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from profiling import SlowRequestLog, SlowRequestMiddleware
+
+
+async def _slow(request):
+    await asyncio.sleep(0.06)
+    return PlainTextResponse("done")
+
+
+async def _stream(request):
+    async def chunks():
+        yield b"first\n"
+        # A client holding the stream open, not a slow server
+        await asyncio.sleep(0.1)
+        yield b"second\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+def _get(log: SlowRequestLog, path: str) -> str:
+    app = SlowRequestMiddleware(Starlette(routes=[Route("/slow", _slow), Route("/stream", _stream)]), log=log)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (await client.get(path)).text
+
+    return asyncio.run(run())
+
+
+def test_slow_request_is_logged():
+    log = SlowRequestLog(threshold=0.05)
+    assert _get(log, "/slow") == "done"
+    assert [(entry["path"], entry["status"]) for entry in log.recent()] == [("/slow", 200)]
+
+
+def test_streaming_response_is_timed_to_its_first_chunk():
+    log = SlowRequestLog(threshold=0.05)
+    assert _get(log, "/stream") == "first\nsecond\n"
+    assert log.recent() == []
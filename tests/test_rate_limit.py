@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from rate_limit import MemoryRateLimitBackend, RateLimiter, RateLimitExceeded, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit("5/60") == (5, 60)
+    assert parse_limit("") is None
+
+
+def test_requests_over_the_limit_are_rejected_per_key():
+    limiter = RateLimiter(MemoryRateLimitBackend(), {"ip": (3, 60), "email": None})
+
+    async def run():
+        for _ in range(3):
+            await limiter.check(ip="10.0.0.1", email="visitor@example.com")
+        with pytest.raises(RateLimitExceeded) as rejected:
+            await limiter.check(ip="10.0.0.1")
+        # Other clients have their own budget
+        await limiter.check(ip="10.0.0.2")
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert rejected.rule == "ip"
+    assert 1 <= rejected.retry_after <= 60
+
+
+def test_rejected_requests_are_not_counted_against_other_rules():
+    backend = MemoryRateLimitBackend()
+    limiter = RateLimiter(backend, {"ip": (1, 60), "email": (2, 600)})
+
+    async def run():
+        await limiter.check(ip="10.0.0.1", email="visitor@example.com")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.check(ip="10.0.0.1", email="visitor@example.com")
+        # The rejected request did not use up the email budget
+        await limiter.check(ip="10.0.0.2", email="visitor@example.com")
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from retention import CollectionArchive, RetentionPolicy, apply_retention, parse_days
+from tests.fake_motor import FakeMotorClient
+
+NOW = datetime(2024, 6, 1)
+
+
+def _documents():
+    def message(message_id, status, days_old):
+        return {"id": message_id, "status": status, "timestamp": NOW - timedelta(days=days_old),
+                "ip_address": "10.0.0.1", "user_agent": "Mozilla/5.0"}
+
+    return [
+        message("old-spam", "spam", 40),
+        message("new-spam", "spam", 5),
+        message("old-read", "read", 100),
+        message("ancient", "responded", 400),
+        message("fresh", "new", 1),
+    ]
+
+
+def _collections():
+    FakeMotorClient.reset()
+    database = FakeMotorClient()["test"]
+    return database.contact_messages, database.contact_messages_archive
+
+
+POLICY = RetentionPolicy(delete_after=parse_days("spam=30"), scrub_after=parse_days("*=90"), archive_after=365)
+
+
+def test_policy_deletes_scrubs_and_archives():
+    collection, archive = _collections()
+
+    async def run():
+        await collection.insert_many(_documents())
+        return await apply_retention(collection, POLICY, CollectionArchive(archive), now=NOW)
+
+    assert asyncio.run(run()) == {"deleted": 1, "scrubbed": 2, "archived": 1}
+    remaining = {document["id"]: document for document in collection._documents}
+    assert sorted(remaining) == ["fresh", "new-spam", "old-read"]
+    assert remaining["old-read"]["ip_address"] is None and remaining["fresh"]["ip_address"] == "10.0.0.1"
+    assert [document["id"] for document in archive._documents] == ["ancient"]
+
+
+def test_dry_run_counts_without_changing_anything():
+    collection, archive = _collections()
+
+    async def run():
+        await collection.insert_many(_documents())
+        return await apply_retention(collection, POLICY, CollectionArchive(archive), dry_run=True, now=NOW)
+
+    assert asyncio.run(run()) == {"deleted": 1, "scrubbed": 2, "archived": 1}
+    assert len(collection._documents) == 5 and archive._documents == []
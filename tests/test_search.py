@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+
+from filters import message_filter
+from search import MemorySearchIndex
+
+
+def _index() -> MemorySearchIndex:
+    index = MemorySearchIndex()
+    for n, day in enumerate((1, 2, 3)):
+        index.add({
+            "id": f"m{n}", "name": "Visitor", "email": f"v{n}@example.com", "subject": "Internship question",
+            "message": "About the backend role" if n else "About the frontend role",
+            "status": "new", "timestamp": datetime(2024, 5, day, 12),
+        })
+    return index
+
+
+def test_search_ranks_matching_messages_and_counts_facets():
+    ranked, by_status, by_day = _index().search("backend internship")
+    assert [message_id for message_id, _ in ranked][:2] in (["m1", "m2"], ["m2", "m1"])
+    assert ranked[-1][0] == "m0"
+    assert by_status == {"new": 3}
+    assert by_day == {"2024-05-01": 1, "2024-05-02": 1, "2024-05-03": 1}
+
+
+def test_timezone_aware_bounds_are_compared_as_utc():
+    index = _index()
+    # 2024-05-02 14:00 at UTC+2 is 12:00 UTC, so m1 is included
+    since = datetime(2024, 5, 2, 14, tzinfo=timezone(timedelta(hours=2)))
+    ranked, _, _ = index.search("internship", since=since)
+    assert sorted(message_id for message_id, _ in ranked) == ["m1", "m2"]
+
+    index.set_status_where("read", since=since)
+    _, by_status, _ = index.search("internship")
+    assert by_status == {"new": 1, "read": 2}
+
+
+def test_message_filter_converts_aware_bounds_to_naive_utc():
+    query = message_filter(until=datetime(2024, 5, 2, 14, tzinfo=timezone(timedelta(hours=2))))
+    assert query == {"timestamp": {"$lt": datetime(2024, 5, 2, 12)}}
@@ -0,0 +1,48 @@
+import asyncio
+
+from spam import DuplicateDetector
+from tests.app_client import app_client
+from tests.fake_motor import FakeCollection
+
+BODY = "I would love to talk about the backend internship you posted last week."
+
+
+def test_exact_and_near_duplicates_are_flagged():
+    detector = DuplicateDetector()
+    assert detector.check("Internship", BODY) is None
+    assert detector.check("Internship", BODY.upper()) == "duplicate"
+    # Same words, different punctuation: not byte-identical, but the same signature
+    assert detector.check("Internship", BODY.replace("week.", "week!!")) == "near_duplicate"
+
+
+def test_forgotten_messages_are_not_flagged():
+    detector = DuplicateDetector()
+    detector.check("Internship", BODY)
+    detector.forget("Internship", BODY)
+    assert detector.check("Internship", BODY) is None
+
+
+def test_retry_after_a_failed_insert_is_not_a_duplicate(monkeypatch):
+    insert_one = FakeCollection.insert_one
+    failures = [RuntimeError("primary stepped down")]
+
+    async def flaky_insert_one(self, document, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await insert_one(self, document, **kwargs)
+
+    monkeypatch.setattr(FakeCollection, "insert_one", flaky_insert_one)
+    body = {"name": "Visitor", "email": "visitor@example.com", "subject": "Internship", "message": BODY}
+
+    async def run():
+        async with app_client() as (server, client):
+            failed = await client.post("/api/contact", json=body)
+            retried = await client.post("/api/contact", json=body)
+            repeated = await client.post("/api/contact", json=body)
+            stored = await server.db.contact_messages.find({}, {"_id": 0, "status": 1}).to_list(length=None)
+            return failed.status_code, retried.status_code, repeated.status_code, [document["status"] for document in stored]
+
+    failed, retried, repeated, statuses = asyncio.run(run())
+    assert (failed, retried, repeated) == (500, 200, 200)
+    # The retry is stored as new; only the third submission is a duplicate
+    assert statuses == ["new", "spam"]
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+import static_assets
+from static_assets import StaticAssetCache, asset_response
+
+BODY = b"0123456789" * 100
+
+
+def test_assets_are_compressed_off_the_event_loop(tmp_path, monkeypatch):
+    (tmp_path / "resume.txt").write_text("experience " * 500)
+    threads = []
+    compress = static_assets.StaticAsset._compress
+
+    def recording_compress(self):
+        threads.append(threading.get_ident())
+        compress(self)
+
+    monkeypatch.setattr(static_assets.StaticAsset, "_compress", recording_compress)
+    cache = StaticAssetCache(tmp_path, revalidate_interval=0)
+
+    async def run():
+        asset = await cache.get("resume.txt")
+        missing = await cache.get("missing.txt")
+        return asset, missing, threading.get_ident()
+
+    asset, missing, loop_thread = asyncio.run(run())
+    assert "gzip" in asset.variants and missing is None
+    assert threads and loop_thread not in threads
+
+
+def test_changed_files_are_reloaded(tmp_path):
+    path = tmp_path / "resume.txt"
+    path.write_text("first")
+    cache = StaticAssetCache(tmp_path, revalidate_interval=0)
+
+    async def run():
+        first = await cache.get("resume.txt")
+        unchanged = await cache.get("resume.txt")
+        path.write_text("second version")
+        return first, unchanged, await cache.get("resume.txt")
+
+    first, unchanged, changed = asyncio.run(run())
+    assert unchanged is first
+    assert changed.body == b"second version"
+
+
+def _responses(tmp_path, *headers_list):
+    (tmp_path / "resume.txt").write_bytes(BODY)
+    cache = StaticAssetCache(tmp_path)
+
+    async def resume(request):
+        return asset_response(await cache.get("resume.txt"), request)
+
+    app = Starlette(routes=[Route("/resume", resume)])
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get("/resume", headers={"Accept-Encoding": "identity", **headers}) for headers in headers_list]
+
+    return asyncio.run(run())
+
+
+def test_conditional_requests_get_304(tmp_path):
+    full, stale = _responses(tmp_path, {}, {"If-None-Match": '"other"'})
+    assert full.status_code == 200 and full.content == BODY
+    by_etag, by_date = _responses(
+        tmp_path, {"If-None-Match": full.headers["etag"]}, {"If-Modified-Since": full.headers["last-modified"]}
+    )
+    assert by_etag.status_code == 304 and by_etag.content == b""
+    assert by_date.status_code == 304
+    assert stale.status_code == 200
+
+
+def test_ranges(tmp_path):
+    first, suffix, open_ended, unsatisfiable = _responses(
+        tmp_path, {"Range": "bytes=0-4"}, {"Range": "bytes=-5"}, {"Range": "bytes=995-"}, {"Range": "bytes=5000-"}
+    )
+    assert first.status_code == 206 and first.content == b"01234"
+    assert first.headers["content-range"] == f"bytes 0-4/{len(BODY)}"
+    assert suffix.content == b"56789" and open_ended.content == b"56789"
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_invalid_ranges_are_ignored(tmp_path):
+    for response in _responses(tmp_path, {"Range": "bytes=abc-"}, {"Range": "bytes=9-2"}, {"Range": "bytes=-"}, {"Range": "items=0-4"}):
+        assert response.status_code == 200 and response.content == BODY
+
+
+def test_if_range_only_honours_the_current_validator(tmp_path):
+    (full,) = _responses(tmp_path, {})
+    current, outdated = _responses(
+        tmp_path,
+        {"Range": "bytes=0-4", "If-Range": full.headers["etag"]},
+        {"Range": "bytes=0-4", "If-Range": '"outdated"'},
+    )
+    assert current.status_code == 206 and current.content == b"01234"
+    assert outdated.status_code == 200 and outdated.content == BODY
+
+
+def test_encoded_variant_is_chosen_from_accept_encoding(tmp_path):
+    (identity,) = _responses(tmp_path, {})
+    compressed, refused = _responses(tmp_path, {"Accept-Encoding": "gzip"}, {"Accept-Encoding": "gzip;q=0"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+    # httpx decodes the body
+    assert compressed.content == BODY
+    assert "content-encoding" not in refused.headers and refused.headers["etag"] == identity.headers["etag"]